@@ -0,0 +1,166 @@
+"""Benchmark de montée en charge du pipeline d'imputation
+
+Génère des datasets synthétiques au schéma de synthetic_dataset.csv (Category,
+Price, Rating, Stock, Discount), en faisant varier indépendamment le nombre de
+lignes, le nombre de colonnes et le taux de valeurs manquantes, puis mesure le
+temps et le pic mémoire de chaque étape (détection, imputation par méthode,
+comparaison).
+
+Usage :
+    python benchmark.py --rows 1000 10000 --columns 5 20 --missing-rate 0.1 0.3 \\
+        --methods "Simple - Mean" KNN --output bench.json
+"""
+
+import argparse
+import itertools
+import json
+import platform
+import sys
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import sklearn
+from models.comparison_engine import ComparisonEngine
+from models.imputation_engine import IMPUTATION_METHODS, ImputationEngine
+from models.instrumentation import measure
+from models.missing_detector import MissingDetector
+
+BASE_COLUMNS = ["Category", "Price", "Rating", "Stock", "Discount"]
+
+
+def generate_dataset(n_rows, n_columns=5, missing_rate=0.2, seed=42):
+    """Dataset synthétique ; au-delà de 5 colonnes, le schéma est répété
+    (Price_2, Rating_2, ...)"""
+    rng = np.random.default_rng(seed)
+    generators = {
+        "Category": lambda: rng.choice(["A", "B", "C", "D"], size=n_rows).astype(
+            object
+        ),
+        "Price": lambda: rng.integers(100, 10_000, size=n_rows).astype(float),
+        "Rating": lambda: rng.uniform(1, 5, size=n_rows),
+        "Stock": lambda: rng.choice(["In Stock", "Out of Stock"], size=n_rows).astype(
+            object
+        ),
+        "Discount": lambda: rng.integers(0, 50, size=n_rows).astype(float),
+    }
+
+    data = {}
+    for i in range(n_columns):
+        name = BASE_COLUMNS[i % len(BASE_COLUMNS)]
+        suffix = "" if i < len(BASE_COLUMNS) else f"_{i // len(BASE_COLUMNS) + 1}"
+        data[name + suffix] = generators[name]()
+    df = pd.DataFrame(data)
+
+    # Valeurs manquantes : NaN et quelques valeurs sentinelles dans le texte
+    for col in df.columns:
+        missing = rng.random(n_rows) < missing_rate
+        if df[col].dtype == object:
+            sentinels = rng.random(n_rows) < 0.1
+            df.loc[missing & sentinels, col] = "N/A"
+            df.loc[missing & ~sentinels, col] = np.nan
+        else:
+            df.loc[missing, col] = np.nan
+
+    return df
+
+
+def run_case(n_rows, n_columns, missing_rate, methods, seed, track_memory):
+    df = generate_dataset(n_rows, n_columns, missing_rate, seed)
+    case = {
+        "rows": n_rows,
+        "columns": n_columns,
+        "missing_rate": missing_rate,
+        "stages": {},
+        "methods": {},
+    }
+
+    def record(target, name, func):
+        with measure(track_memory) as stats:
+            result = func()
+        target[name] = {
+            "seconds": round(stats["seconds"], 4),
+            "peak_mb": stats.get("peak_mb"),
+        }
+        return result
+
+    # Détection
+    def detect():
+        detector = MissingDetector(df)
+        detector._detect_automatic_missing()
+        return detector.process(detector.build_config(handle_outliers=True))
+
+    df_processed = record(case["stages"], "detection", detect)
+
+    # Imputation, méthode par méthode
+    imputer = ImputationEngine(df_processed)
+    results = {}
+    for method_name in methods:
+        config = IMPUTATION_METHODS[method_name]
+        try:
+            results[method_name] = record(
+                case["methods"],
+                method_name,
+                lambda: imputer._fit_imputer(config)[0],
+            )
+        except Exception as e:
+            case["methods"][method_name] = {"error": str(e)}
+
+    # Comparaison (toutes les métriques, toutes les colonnes)
+    def compare():
+        comparator = ComparisonEngine(df_processed, results)
+        comparator.compute_global_metrics()
+        for col in comparator.missing_columns():
+            comparator.compute_column_metrics(col)
+
+    record(case["stages"], "comparison", compare)
+
+    return case
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000])
+    parser.add_argument("--columns", type=int, nargs="+", default=[5])
+    parser.add_argument("--missing-rate", type=float, nargs="+", default=[0.2])
+    parser.add_argument(
+        "--methods",
+        nargs="+",
+        default=list(IMPUTATION_METHODS),
+        choices=list(IMPUTATION_METHODS),
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--no-memory",
+        action="store_true",
+        help="Ne pas mesurer le pic mémoire (tracemalloc ralentit les mesures)",
+    )
+    parser.add_argument("--output", default="benchmark_results.json")
+    args = parser.parse_args(argv)
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "scikit-learn": sklearn.__version__,
+        "cases": [],
+    }
+
+    for n_rows, n_columns, missing_rate in itertools.product(
+        args.rows, args.columns, args.missing_rate
+    ):
+        case = run_case(
+            n_rows, n_columns, missing_rate, args.methods, args.seed, not args.no_memory
+        )
+        report["cases"].append(case)
+        print(json.dumps(case), file=sys.stderr)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
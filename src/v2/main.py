@@ -4,8 +4,14 @@ import streamlit as st
 from models.comparison_engine import ComparisonEngine
 from models.data_analyzer import DataAnalyzer
 from models.imputation_engine import ImputationEngine
+from models.instrumentation import Instrumentation
 from models.missing_detector import MissingDetector
-from utils import load_data
+from utils import (
+    SUPPORTED_EXTENSIONS,
+    get_metrics_cache,
+    get_result_cache,
+    load_data_cached,
+)
 
 st.set_page_config(page_title="Imputation Manager", layout="wide")
 
@@ -19,69 +25,114 @@ def main():
     # Upload avec support multi-format
     uploaded_file = st.file_uploader(
         "Upload fichier de données",
-        type=["csv", "xlsx", "xls", "json"],
+        type=SUPPORTED_EXTENSIONS,
     )
-
-    if uploaded_file:
-        df = load_data(uploaded_file)
-
-        if df is not None:
-            st.session_state.df_original = df
-
-            # Analyse exploratoire AVEC la colonne target
-            st.header("📊 Analyse Exploratoire")
-            analyzer = DataAnalyzer(df)  # Utilise df complet avec target
+    compact = st.checkbox(
+        "Mode mémoire optimisée",
+        help="Lecture par blocs et types compacts (float32, entiers nullables, category)",
+    )
+    instrumentation = Instrumentation(
+        track_memory=st.sidebar.checkbox(
+            "Mesurer la mémoire par étape",
+            help="Pic mémoire de chaque étape et méthode (tracemalloc, ralentit les calculs)",
+        ),
+        profile=st.sidebar.button(
+            "Profiler une exécution",
+            help="Relance l'application sous cProfile et affiche les points chauds",
+        ),
+    )
+    instrumentation.start_profiling()
+    try:
+        if uploaded_file:
+            process_file(uploaded_file, compact, instrumentation)
+    finally:
+        instrumentation.stop_profiling()
+    instrumentation.display()
+
+
+def process_file(uploaded_file, compact, instrumentation):
+    """Chargement, analyse, détection, imputation, comparaison et export"""
+    # Chargement mis en cache par contenu du fichier
+    with instrumentation.stage("Chargement"):
+        summary = load_data_cached(uploaded_file, compact=compact)
+
+    if summary is not None:
+        df = summary.df
+        st.session_state.df_original = df
+        instrumentation.dataset_bytes = summary.nbytes
+
+        # Analyse exploratoire AVEC la colonne target
+        st.header("📊 Analyse Exploratoire")
+        with instrumentation.stage("Analyse exploratoire"):
+            analyzer = DataAnalyzer(df, summary)  # Utilise df complet avec target
             analyzer.display_summary()
 
-            # Exclure la colonne target seulement pour le traitement
-            # Sélection de la colonne target
-            st.header("🎯 Sélection de la colonne target")
-            st.write(
-                "Sélectionnez la colonne target (variable à prédire) si elle existe dans vos données :"
-            )
-
-            target_col = st.selectbox(
-                "Colonne target (optionnel)",
-                options=["Aucune"] + list(df.columns),
-                help="Cette colonne sera exclue du traitement d'imputation",
-            )
-            if target_col != "Aucune":
-                df_features = df.drop(columns=[target_col])
-                st.info(f"ℹ️ Colonne '{target_col}' exclue du traitement d'imputation")
-            else:
-                df_features = df.copy()
-            # Configuration des valeurs manquantes et outliers SANS la colonne target
-            st.header("🔧 Configuration des Valeurs Manquantes et Outliers")
-
-            detector = MissingDetector(df_features)
-            missing_config = detector.configure_missing_values()
-
-            if missing_config:
-                # Préparation des données
+        # Exclure la colonne target seulement pour le traitement
+        # Sélection de la colonne target
+        st.header("🎯 Sélection de la colonne target")
+        st.write(
+            "Sélectionnez la colonne target (variable à prédire) si elle existe dans vos données :"
+        )
+
+        target_col = st.selectbox(
+            "Colonne target (optionnel)",
+            options=["Aucune"] + list(df.columns),
+            help="Cette colonne sera exclue du traitement d'imputation",
+        )
+        if target_col != "Aucune":
+            df_features = df.drop(columns=[target_col])
+            st.info(f"ℹ️ Colonne '{target_col}' exclue du traitement d'imputation")
+        else:
+            df_features = df.copy()
+        # Configuration des valeurs manquantes et outliers SANS la colonne target
+        st.header("🔧 Configuration des Valeurs Manquantes et Outliers")
+
+        detector = MissingDetector(df_features)
+        missing_config = detector.configure_missing_values()
+
+        if missing_config:
+            # Préparation des données
+            with instrumentation.stage("Détection"):
                 df_processed = detector.apply_missing_detection(missing_config)
 
-                # Vérification finale avant imputation
-                if df_processed.isnull().sum().sum() > 0:
-                    st.header("🔄 Méthodes d'Imputation")
-                    imputer = ImputationEngine(df_processed)
-                    methods = imputer.select_methods()
-
-                    if methods:
-                        # Exécution des imputations
+            # Vérification finale avant imputation
+            if df_processed.isnull().sum().sum() > 0:
+                st.header("🔄 Méthodes d'Imputation")
+                # Résultats mémorisés dans la session : seules les méthodes
+                # nouvelles ou reparamétrées sont recalculées
+                imputer = ImputationEngine(
+                    df_processed,
+                    instrumentation=instrumentation,
+                    result_cache=get_result_cache(),
+                )
+                methods = imputer.select_methods()
+
+                if methods:
+                    # Exécution des imputations
+                    with instrumentation.stage("Imputation"):
                         results = imputer.execute_imputation(methods)
 
-                        # Comparaison
-                        st.header("📈 Comparaison des Résultats")
-                        comparator = ComparisonEngine(df_processed, results)
+                    # Comparaison
+                    st.header("📈 Comparaison des Résultats")
+                    with instrumentation.stage("Comparaison"):
+                        comparator = ComparisonEngine(
+                            df_processed,
+                            results,
+                            methods,
+                            n_jobs=imputer.n_jobs,
+                            metrics_cache=get_metrics_cache(),
+                            cache_key=imputer.comparison_key(methods, results),
+                        )
                         comparator.display_comparison()
 
-                        # Export
-                        st.header("💾 Export")
-                        comparator.export_results()
-                else:
-                    st.success(
-                        "✅ Aucune valeur manquante à imputer après le traitement des outliers"
-                    )
+                    # Export
+                    st.header("💾 Export")
+                    comparator.export_results()
+                    imputer.export_fitted_imputers()
+            else:
+                st.success(
+                    "✅ Aucune valeur manquante à imputer après le traitement des outliers"
+                )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,80 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+_MISSING = object()
+
+
+def hash_bytes(buffer, chunk_size=64 * 1024 * 1024):
+    """Empreinte du contenu d'un buffer (bytes, memoryview) par blocs, sans copie"""
+    view = memoryview(buffer)
+    hasher = hashlib.blake2b(digest_size=16)
+
+    for start in range(0, len(view), chunk_size):
+        hasher.update(view[start : start + chunk_size])
+
+    return hasher.hexdigest()
+
+
+def hash_dataframe(df):
+    """Empreinte du contenu d'un DataFrame (valeurs, index, colonnes et types)"""
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    hasher.update(repr(list(df.columns)).encode())
+    hasher.update(repr([str(dtype) for dtype in df.dtypes]).encode())
+    return hasher.hexdigest()
+
+
+class LRUCache:
+    def __init__(self, max_size, sizeof=None):
+        self.max_size = max_size
+        self.sizeof = sizeof or (lambda value: 1)
+        self.current_size = 0
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def set(self, key, value):
+        size = self.sizeof(value)
+
+        with self._lock:
+            if key in self._entries:
+                self.current_size -= self._sizes.pop(key)
+                del self._entries[key]
+
+            self._entries[key] = value
+            self._sizes[key] = size
+            self.current_size += size
+
+            # Éviction LRU (on garde toujours l'entrée la plus récente)
+            while self.current_size > self.max_size and len(self._entries) > 1:
+                old_key, _ = self._entries.popitem(last=False)
+                self.current_size -= self._sizes.pop(old_key)
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.current_size = 0
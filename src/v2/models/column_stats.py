@@ -0,0 +1,129 @@
+import numpy as np
+
+from .quantile_sketch import DEFAULT_SKETCH_SIZE, QuantileSketch
+
+
+class ColumnStats:
+    """Quartiles, bornes IQR et outliers de toutes les colonnes numériques
+
+    Calculés une seule fois (un seul appel à DataFrame.quantile) et partagés
+    entre la détection des outliers et les boxplots.
+    """
+
+    def __init__(self, df, factor=1.5):
+        numeric_df = df.select_dtypes(include=[np.number])
+        self.columns = numeric_df.columns
+
+        quantiles = numeric_df.quantile([0.25, 0.75])
+        self.count = numeric_df.count()
+        self.q1 = quantiles.loc[0.25]
+        self.q3 = quantiles.loc[0.75]
+        self.iqr = self.q3 - self.q1
+
+        # Colonnes vides : bornes à 0 comme auparavant
+        self.lower_bound = (self.q1 - factor * self.iqr).fillna(0)
+        self.upper_bound = (self.q3 + factor * self.iqr).fillna(0)
+
+        self.outlier_mask = (
+            numeric_df.lt(self.lower_bound, axis=1)
+            | numeric_df.gt(self.upper_bound, axis=1)
+        ).fillna(False)
+        self.outliers_count = self.outlier_mask.sum()
+        self._numeric_df = numeric_df
+
+    def get(self, col):
+        mask = self.outlier_mask[col]
+
+        return {
+            "outliers_count": int(self.outliers_count[col]),
+            "lower_bound": self.lower_bound[col],
+            "upper_bound": self.upper_bound[col],
+            "outliers": self._numeric_df.loc[mask, col],
+            "mask": mask,
+            "q1": self.q1[col],
+            "q3": self.q3[col],
+            "iqr": self.iqr[col],
+            "count": int(self.count[col]),
+        }
+
+
+class SketchColumnStats:
+    """Quartiles et bornes IQR approchés, calculés en une passe par blocs
+
+    Une esquisse de quantiles fusionnable par colonne numérique (erreur de
+    rang de l'ordre de 1 %) : la mémoire ne dépend pas du nombre de lignes, et
+    les statistiques de partitions ou de processus différents se combinent
+    avec merge. Le minimum et le maximum exacts indiquent sans erreur si une
+    colonne a des outliers ; leur nombre est estimé par l'esquisse.
+    """
+
+    def __init__(self, factor=1.5, sketch_size=DEFAULT_SKETCH_SIZE):
+        self.factor = factor
+        self.sketch_size = sketch_size
+        self.sketches = {}
+        self.minimums = {}
+        self.maximums = {}
+
+    @property
+    def columns(self):
+        return list(self.sketches)
+
+    def partial_fit(self, chunk):
+        for col in chunk.select_dtypes(include=[np.number]).columns:
+            values = chunk[col].to_numpy(dtype=float, na_value=np.nan)
+            values = values[~np.isnan(values)]
+
+            sketch = self.sketches.setdefault(col, QuantileSketch(self.sketch_size))
+            sketch.update(values)
+            if len(values) > 0:
+                self.minimums[col] = min(self.minimums.get(col, np.inf), values.min())
+                self.maximums[col] = max(self.maximums.get(col, -np.inf), values.max())
+
+        return self
+
+    def merge(self, other):
+        for col, sketch in other.sketches.items():
+            self.sketches.setdefault(col, QuantileSketch(self.sketch_size)).merge(
+                sketch
+            )
+            if col in other.minimums:
+                self.minimums[col] = min(
+                    self.minimums.get(col, np.inf), other.minimums[col]
+                )
+                self.maximums[col] = max(
+                    self.maximums.get(col, -np.inf), other.maximums[col]
+                )
+
+        return self
+
+    def get(self, col):
+        sketch = self.sketches[col]
+        q1, q3 = sketch.quantile([0.25, 0.75])
+        iqr = q3 - q1
+
+        # Colonnes vides : bornes à 0 comme ColumnStats
+        if sketch.count == 0:
+            lower_bound = upper_bound = 0
+        else:
+            lower_bound = q1 - self.factor * iqr
+            upper_bound = q3 + self.factor * iqr
+
+        outliers_count = 0
+        if sketch.count > 0 and (
+            self.minimums[col] < lower_bound or self.maximums[col] > upper_bound
+        ):
+            outside = (
+                sketch.rank(lower_bound) + 1 - sketch.rank(upper_bound, inclusive=True)
+            )
+            # Au moins un outlier (minimum ou maximum hors des bornes)
+            outliers_count = max(int(round(outside * sketch.count)), 1)
+
+        return {
+            "outliers_count": outliers_count,
+            "lower_bound": lower_bound,
+            "upper_bound": upper_bound,
+            "q1": q1,
+            "q3": q3,
+            "iqr": iqr,
+            "count": sketch.count,
+        }
@@ -1,19 +1,37 @@
-import io
-
 import numpy as np
 import pandas as pd
 import streamlit as st
-from scipy import stats
-from sklearn.metrics import accuracy_score, mean_squared_error
 
+from .exporter import EXPORT_FORMATS, archive_file, export_file_name, result_file
+from .holdout_evaluator import HoldoutEvaluator
+from .imputation_engine import ImputationEngine
 from .visualizer import Visualizer
 
 
 class ComparisonEngine:
-    def __init__(self, original_df, imputed_results):
+    def __init__(
+        self,
+        original_df,
+        imputed_results,
+        methods=None,
+        n_jobs=1,
+        metrics_cache=None,
+        cache_key=None,
+    ):
         self.original_df = original_df
         self.imputed_results = imputed_results
+        # Configurations des méthodes, pour l'évaluation par masquage
+        self.methods = methods or {}
+        # Processus de l'évaluation par masquage (choisis avec les méthodes)
+        self.n_jobs = n_jobs
         self.visualizer = Visualizer()
+        # Calculs mémorisés (comptes d'origine, métriques par colonne)
+        self._missing_counts = None
+        self._column_metrics = None
+        # Métriques par colonne conservées d'un rerun à l'autre (LRUCache), par
+        # cache_key (ImputationEngine.comparison_key)
+        self.metrics_cache = metrics_cache
+        self.cache_key = cache_key
 
     def display_comparison(self):
         if not self.imputed_results:
@@ -32,15 +50,26 @@ class ComparisonEngine:
         st.subheader("Visualisations comparatives")
         self._display_visualizations()
 
+        # Précision sur des valeurs connues masquées
+        if self.methods:
+            st.subheader("Évaluation de la précision (masquage)")
+            self._display_holdout_evaluation()
+
     def _display_global_metrics(self):
+        metrics_df = self.compute_global_metrics()
+        st.dataframe(metrics_df, use_container_width=True)
+
+    def compute_global_metrics(self):
         metrics_data = []
 
-        for method_name, imputed_df in self.imputed_results.items():
+        # Valeurs manquantes d'origine, comptées une seule fois
+        original_missing = self._original_missing_counts().sum()
+
+        for method_name, result in self.imputed_results.items():
             # Valeurs manquantes restantes
-            remaining_missing = imputed_df.isnull().sum().sum()
+            remaining_missing = result.remaining_missing()
 
             # Pourcentage d'imputation
-            original_missing = self.original_df.isnull().sum().sum()
             imputation_rate = (
                 ((original_missing - remaining_missing) / original_missing * 100)
                 if original_missing > 0
@@ -48,7 +77,7 @@ class ComparisonEngine:
             )
 
             # Cohérence des types
-            type_consistency = self._check_type_consistency(imputed_df)
+            type_consistency = self._check_type_consistency(result)
 
             metrics_data.append(
                 {
@@ -59,59 +88,129 @@ class ComparisonEngine:
                 }
             )
 
-        metrics_df = pd.DataFrame(metrics_data)
-        st.dataframe(metrics_df, use_container_width=True)
+        return pd.DataFrame(metrics_data)
+
+    def _display_holdout_evaluation(self):
+        st.write(
+            "Une fraction des valeurs connues est masquée puis imputée : "
+            "RMSE/MAE pour les colonnes numériques, exactitude pour les catégorielles."
+        )
+        col1, col2 = st.columns(2)
+        with col1:
+            fraction = st.slider("Fraction masquée", 0.05, 0.5, 0.1, step=0.05)
+        with col2:
+            n_repeats = st.slider("Nombre de répétitions", 1, 10, 3)
+
+        if st.button("Lancer l'évaluation"):
+            with st.spinner("Évaluation en cours..."):
+                holdout_df = self.compute_holdout_metrics(fraction, n_repeats)
+            st.dataframe(holdout_df, use_container_width=True)
+
+    def compute_holdout_metrics(self, fraction=0.1, n_repeats=3, n_jobs=None, seed=42):
+        # Seules les méthodes ayant abouti sont évaluées ; les chaînes MICE non
+        # regroupées ("MICE Forest #1", ...) sont évaluées regroupées
+        methods = {
+            name: config
+            for name, config in self.methods.items()
+            if any(
+                output in self.imputed_results
+                for output in ImputationEngine.output_names({name: config})
+            )
+        }
+        n_jobs = n_jobs if n_jobs is not None else self.n_jobs
+        evaluator = HoldoutEvaluator(
+            self.original_df, methods, fraction, n_repeats, n_jobs, seed
+        )
+        return evaluator.evaluate()
 
     def _display_column_comparison(self):
         # Sélection de colonne
-        missing_cols = [
-            col
-            for col in self.original_df.columns
-            if self.original_df[col].isnull().any()
-        ]
+        missing_cols = self.missing_columns()
 
         if not missing_cols:
             st.info("Aucune colonne avec des valeurs manquantes")
             return
 
+        # Toutes les (méthode, colonne) sont calculées avant la sélection :
+        # changer de colonne ne fait qu'afficher une table déjà prête
+        column_metrics = self.compute_all_column_metrics()
+
         selected_col = st.selectbox("Sélectionner une colonne", missing_cols)
 
+        st.dataframe(column_metrics[selected_col], use_container_width=True)
+
+    def _original_missing_counts(self):
+        if self._missing_counts is None:
+            self._missing_counts = self.original_df.isnull().sum()
+        return self._missing_counts
+
+    def missing_columns(self):
+        missing_counts = self._original_missing_counts()
+        return list(missing_counts.index[missing_counts > 0])
+
+    def compute_all_column_metrics(self):
+        """Métriques par colonne de toutes les méthodes, en une passe : chaque
+        colonne d'origine n'est triée (ou comptée) qu'une fois"""
+        if self._column_metrics is None:
+            if self.metrics_cache is not None and self.cache_key is not None:
+                self._column_metrics = self.metrics_cache.get_or_compute(
+                    self.cache_key, self._compute_all_column_metrics
+                )
+            else:
+                self._column_metrics = self._compute_all_column_metrics()
+        return self._column_metrics
+
+    def _compute_all_column_metrics(self):
+        return {
+            col: self._compute_column_metrics(col) for col in self.missing_columns()
+        }
+
+    def compute_column_metrics(self, selected_col):
+        return self.compute_all_column_metrics()[selected_col]
+
+    def _compute_column_metrics(self, selected_col):
         # Métriques par colonne
         col_metrics = []
+        observed = self.original_df[selected_col].dropna()
+
+        if pd.api.types.is_numeric_dtype(self.original_df[selected_col]):
+            # Colonne d'origine triée une fois pour toutes les méthodes
+            original_sorted = np.sort(observed.to_numpy(dtype=float))
+            original_cdf = np.searchsorted(
+                original_sorted, original_sorted, side="right"
+            ) / max(len(original_sorted), 1)
+            metric_name = "Similarité distribution"
+        else:
+            original_counts = observed.value_counts()
+            metric_name = "Cohérence catégorielle"
 
-        for method_name, imputed_df in self.imputed_results.items():
-            if pd.api.types.is_numeric_dtype(self.original_df[selected_col]):
-                # Métriques pour colonnes numériques
+        for method_name, result in self.imputed_results.items():
+            # Seules les valeurs imputées (delta) sont traitées par méthode
+            imputed_values = result.imputed_values(selected_col)
+            imputed_values = imputed_values[~pd.isnull(imputed_values)]
+
+            if metric_name == "Similarité distribution":
                 metric_value = self._calculate_distribution_similarity(
-                    self.original_df[selected_col].dropna(),
-                    imputed_df[selected_col].dropna(),
+                    original_sorted, original_cdf, imputed_values.astype(float)
                 )
-                metric_name = "Similarité distribution"
             else:
-                # Métriques pour colonnes catégorielles
                 metric_value = self._calculate_categorical_consistency(
-                    self.original_df[selected_col].dropna(),
-                    imputed_df[selected_col].dropna(),
+                    original_counts, imputed_values
                 )
-                metric_name = "Cohérence catégorielle"
 
             col_metrics.append(
                 {
                     "Méthode": method_name,
                     metric_name: round(metric_value, 3),
-                    "Valeurs imputées": imputed_df[selected_col].isnull().sum() == 0,
+                    "Valeurs imputées": result.column_remaining_missing(selected_col)
+                    == 0,
                 }
             )
 
-        col_metrics_df = pd.DataFrame(col_metrics)
-        st.dataframe(col_metrics_df, use_container_width=True)
+        return pd.DataFrame(col_metrics)
 
     def _display_visualizations(self):
-        missing_cols = [
-            col
-            for col in self.original_df.columns
-            if self.original_df[col].isnull().any()
-        ]
+        missing_cols = self.missing_columns()
 
         if not missing_cols:
             return
@@ -134,10 +233,10 @@ class ComparisonEngine:
             self.visualizer.plot_distribution(self.original_df[column].dropna())
 
         # Distributions imputées
-        for i, (method_name, imputed_df) in enumerate(self.imputed_results.items()):
+        for i, (method_name, result) in enumerate(self.imputed_results.items()):
             with cols[i + 1]:
                 st.write(f"**{method_name}**")
-                self.visualizer.plot_distribution(imputed_df[column])
+                self.visualizer.plot_distribution(result.column(column))
 
     def _plot_categorical_comparison(self, column):
         cols = st.columns(len(self.imputed_results) + 1)
@@ -150,47 +249,64 @@ class ComparisonEngine:
             )
 
         # Distributions imputées
-        for i, (method_name, imputed_df) in enumerate(self.imputed_results.items()):
+        for i, (method_name, result) in enumerate(self.imputed_results.items()):
             with cols[i + 1]:
                 st.write(f"**{method_name}**")
-                self.visualizer.plot_categorical_distribution(imputed_df[column])
+                self.visualizer.plot_categorical_distribution(result.column(column))
 
-    def _check_type_consistency(self, imputed_df):
+    def _check_type_consistency(self, result):
         consistent_types = 0
         total_cols = len(self.original_df.columns)
 
         for col in self.original_df.columns:
-            if self.original_df[col].dtype == imputed_df[col].dtype:
+            if self.original_df[col].dtype == result.dtypes[col]:
                 consistent_types += 1
 
         return (consistent_types / total_cols) * 100
 
-    def _calculate_distribution_similarity(self, original_series, imputed_series):
-        try:
-            # Test de Kolmogorov-Smirnov
-            statistic, p_value = stats.ks_2samp(original_series, imputed_series)
-            return 1 - statistic  # Plus proche de 1 = plus similaire
-        except:
+    def _calculate_distribution_similarity(
+        self, original_sorted, original_cdf, imputed_values
+    ):
+        """1 - statistique de Kolmogorov-Smirnov entre la colonne d'origine O et
+        la colonne imputée C = O + valeurs imputées D
+
+        F_C = (n F_O + m F_D) / (n + m), donc sup|F_O - F_C| = m / (n + m) x
+        sup|F_O - F_D| : seules les m valeurs imputées sont triées par méthode.
+        """
+        n, m = len(original_sorted), len(imputed_values)
+        if n == 0:
             return 0.5
+        if m == 0:
+            return 1.0
 
-    def _calculate_categorical_consistency(self, original_series, imputed_series):
-        try:
-            # Comparaison des distributions de fréquence
-            original_counts = original_series.value_counts(normalize=True)
-            imputed_counts = imputed_series.value_counts(normalize=True)
-
-            # Calcul de la similarité
-            common_values = set(original_counts.index) & set(imputed_counts.index)
-            if not common_values:
-                return 0
+        imputed_sorted = np.sort(imputed_values)
 
-            similarity = 0
-            for value in common_values:
-                similarity += min(original_counts[value], imputed_counts[value])
+        # Écarts entre fonctions de répartition aux sauts de F_O puis de F_D
+        gap_original = np.abs(
+            original_cdf
+            - np.searchsorted(imputed_sorted, original_sorted, side="right") / m
+        )
+        gap_imputed = np.abs(
+            np.searchsorted(original_sorted, imputed_sorted, side="right") / n
+            - np.searchsorted(imputed_sorted, imputed_sorted, side="right") / m
+        )
+        statistic = m / (n + m) * max(gap_original.max(), gap_imputed.max())
+        return 1 - statistic  # Plus proche de 1 = plus similaire
+
+    def _calculate_categorical_consistency(self, original_counts, imputed_values):
+        """Recouvrement des distributions de fréquence d'origine et imputée"""
+        n, m = original_counts.sum(), len(imputed_values)
+        if n == 0:
+            return 0
+
+        # Fréquences de la colonne imputée = comptes d'origine + comptes imputés
+        imputed_counts = original_counts.add(
+            pd.Series(imputed_values).value_counts(), fill_value=0
+        )
+        original_freq = original_counts.reindex(imputed_counts.index, fill_value=0) / n
+        imputed_freq = imputed_counts / (n + m)
 
-            return similarity
-        except:
-            return 0.5
+        return float(np.minimum(original_freq, imputed_freq).sum())
 
     def export_results(self):
         if not self.imputed_results:
@@ -198,27 +314,42 @@ class ComparisonEngine:
 
         st.subheader("Export des résultats")
 
-        # Sélection de la méthode à exporter
-        method_to_export = st.selectbox(
-            "Sélectionner la méthode à exporter",
-            options=list(self.imputed_results.keys()),
-        )
-
-        if st.button("Télécharger CSV"):
-            df_to_export = self.imputed_results[method_to_export]
+        col1, col2 = st.columns(2)
+        with col1:
+            # Sélection de la méthode à exporter
+            method_to_export = st.selectbox(
+                "Sélectionner la méthode à exporter",
+                options=list(self.imputed_results.keys()),
+            )
+        with col2:
+            export_format = st.selectbox(
+                "Format",
+                options=list(EXPORT_FORMATS),
+                format_func=lambda fmt: EXPORT_FORMATS[fmt][0],
+            )
 
-            # Conversion en CSV
-            csv_buffer = io.StringIO()
-            df_to_export.to_csv(csv_buffer, index=False)
-            csv_data = csv_buffer.getvalue()
+        # Fichiers générés par blocs, uniquement au clic sur le téléchargement
+        result = self.imputed_results[method_to_export]
+        mime = EXPORT_FORMATS[export_format][2]
 
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button(
+                label=f"📥 Télécharger {method_to_export}",
+                data=lambda: result_file(result, export_format),
+                file_name=export_file_name(method_to_export, export_format),
+                mime=mime,
+                on_click="ignore",
+            )
+        with col2:
             st.download_button(
-                label="📥 Télécharger le fichier CSV",
-                data=csv_data,
-                file_name=f"dataset_imputed_{method_to_export.replace(' ', '_')}.csv",
-                mime="text/csv",
+                label="📦 Télécharger toutes les méthodes (zip)",
+                data=lambda: archive_file(self.imputed_results, export_format),
+                file_name=f"datasets_imputed_{export_format.replace('.', '_')}.zip",
+                mime="application/zip",
+                on_click="ignore",
             )
 
         # Aperçu du résultat
         st.write("**Aperçu du résultat sélectionné :**")
-        st.dataframe(self.imputed_results[method_to_export].head())
+        st.dataframe(result.head())
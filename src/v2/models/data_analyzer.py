@@ -3,30 +3,29 @@ import pandas as pd
 import streamlit as st
 from pandas import DataFrame
 
+from .dataset_summary import DatasetSummary
 from .visualizer import Visualizer
 
 
 class DataAnalyzer:
-    def __init__(self, df: DataFrame):
+    def __init__(self, df: DataFrame, summary: DatasetSummary | None = None):
         self.df = df
+        # Statistiques mémorisées (partagées entre les reruns si mises en cache)
+        self.summary = summary if summary is not None else DatasetSummary(df)
         self.visualizer = Visualizer()
 
     def display_summary(self):
         col1, col2, col3, col4 = st.columns(4)
 
         with col1:
-            st.metric("Lignes", self.df.shape[0])
+            st.metric("Lignes", self.summary.shape[0])
         with col2:
-            st.metric("Colonnes", self.df.shape[1])
+            st.metric("Colonnes", self.summary.shape[1])
         with col3:
-            st.metric("Mémoire", f"{self.df.memory_usage().sum() / 1024:.1f} KB")
+            # Empreinte réelle (deep=True : contenu des colonnes object compris)
+            st.metric("Mémoire", f"{self.summary.nbytes / 1024**2:.1f} MB")
         with col4:
-            missing_pct = (
-                self.df.isnull().sum().sum()
-                / (self.df.shape[0] * self.df.shape[1])
-                * 100
-            )
-            st.metric("Valeurs manquantes", f"{missing_pct:.1f}%")
+            st.metric("Valeurs manquantes", f"{self.summary.missing_pct:.1f}%")
 
         # Aperçu des données
         st.subheader("Aperçu des données")
@@ -35,19 +34,23 @@ class DataAnalyzer:
         # Analyse par colonne
         st.subheader("Analyse par colonne")
 
-        tabs = st.tabs(["Numériques", "Catégorielles", "Valeurs manquantes"])
-
-        with tabs[0]:
-            self._analyze_numeric_columns()
-
-        with tabs[1]:
-            self._analyze_categorical_columns()
-
-        with tabs[2]:
-            self._analyze_missing_values()
+        # Seule la section affichée est calculée (st.tabs exécute tous les onglets)
+        sections = {
+            "Numériques": self._analyze_numeric_columns,
+            "Catégorielles": self._analyze_categorical_columns,
+            "Valeurs manquantes": self._analyze_missing_values,
+        }
+        section = st.radio(
+            "Section",
+            list(sections),
+            horizontal=True,
+            label_visibility="collapsed",
+            key="analysis_section",
+        )
+        sections[section]()
 
     def _analyze_numeric_columns(self):
-        numeric_cols = self.df.select_dtypes(include=[np.number]).columns
+        numeric_cols = self.summary.numeric_columns
 
         if len(numeric_cols) > 0:
             selected_col = st.selectbox("Sélectionner une colonne", numeric_cols)
@@ -56,7 +59,7 @@ class DataAnalyzer:
 
             with col1:
                 st.write("**Statistiques descriptives**")
-                st.dataframe(self.df[selected_col].describe())
+                st.dataframe(self.summary.describe(selected_col))
 
             with col2:
                 st.write("**Distribution**")
@@ -65,7 +68,7 @@ class DataAnalyzer:
             st.info("Aucune colonne numérique détectée")
 
     def _analyze_categorical_columns(self):
-        categorical_cols = self.df.select_dtypes(include=["object"]).columns
+        categorical_cols = self.summary.categorical_columns
 
         if len(categorical_cols) > 0:
             selected_col = st.selectbox(
@@ -76,9 +79,9 @@ class DataAnalyzer:
 
             with col1:
                 st.write("**Valeurs uniques**")
-                st.metric("Nombre", self.df[selected_col].nunique())
+                st.metric("Nombre", self.summary.nunique(selected_col))
 
-                top_values = self.df[selected_col].value_counts().head(10)
+                top_values = self.summary.value_counts(selected_col).head(10)
                 st.dataframe(top_values)
 
             with col2:
@@ -88,7 +91,7 @@ class DataAnalyzer:
             st.info("Aucune colonne catégorielle détectée")
 
     def _analyze_missing_values(self):
-        missing_info = self.df.isnull().sum()
+        missing_info = self.summary.missing_counts
         missing_info = missing_info[missing_info > 0].sort_values(ascending=False)
 
         if len(missing_info) > 0:
@@ -109,13 +112,15 @@ class DataAnalyzer:
 
             with col2:
                 st.write("**Heatmap des valeurs manquantes**")
-                self.visualizer.plot_missing_heatmap(self.df)
+                self.visualizer.plot_missing_heatmap(self.df, key=self.summary.key)
         else:
             st.success("Aucune valeur manquante détectée (NaN)")
 
     def get_column_info(self):
         return {
             "numeric": list(self.df.select_dtypes(include=[np.number]).columns),
-            "categorical": list(self.df.select_dtypes(include=["object"]).columns),
+            "categorical": list(
+                self.df.select_dtypes(include=["object", "category"]).columns
+            ),
             "missing": list(self.df.columns[self.df.isnull().any()]),
         }
@@ -0,0 +1,60 @@
+import numpy as np
+
+
+class DatasetSummary:
+    """Statistiques exploratoires d'un dataset, calculées une seule fois puis mémorisées"""
+
+    def __init__(self, df, key=None):
+        self.df = df
+        self.key = key
+        self._stats = {}
+
+    def _get(self, name, compute):
+        if name not in self._stats:
+            self._stats[name] = compute()
+        return self._stats[name]
+
+    @property
+    def shape(self):
+        return self.df.shape
+
+    @property
+    def missing_counts(self):
+        return self._get("missing_counts", lambda: self.df.isnull().sum())
+
+    @property
+    def missing_pct(self):
+        total_cells = self.df.shape[0] * self.df.shape[1]
+        if total_cells == 0:
+            return 0.0
+        return self.missing_counts.sum() / total_cells * 100
+
+    @property
+    def numeric_columns(self):
+        return self._get(
+            "numeric_columns",
+            lambda: self.df.select_dtypes(include=[np.number]).columns,
+        )
+
+    @property
+    def categorical_columns(self):
+        return self._get(
+            "categorical_columns",
+            lambda: self.df.select_dtypes(include=["object", "category"]).columns,
+        )
+
+    def describe(self, col):
+        return self._get(f"describe:{col}", lambda: self.df[col].describe())
+
+    def value_counts(self, col):
+        return self._get(f"value_counts:{col}", lambda: self.df[col].value_counts())
+
+    def nunique(self, col):
+        return self._get(f"nunique:{col}", lambda: self.df[col].nunique())
+
+    @property
+    def nbytes(self):
+        """Taille de l'entrée en cache, object compris"""
+        return self._get(
+            "memory_deep", lambda: int(self.df.memory_usage(deep=True).sum())
+        )
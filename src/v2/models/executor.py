@@ -0,0 +1,16 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+# Pools de processus réutilisés entre les reruns (le démarrage "spawn" est coûteux)
+_EXECUTORS = {}
+
+
+def get_executor(n_workers):
+    executor = _EXECUTORS.get(n_workers)
+    if executor is None or executor._broken:
+        # "spawn" : pas de fork d'un serveur Streamlit multi-thread
+        executor = ProcessPoolExecutor(
+            max_workers=n_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        _EXECUTORS[n_workers] = executor
+    return executor
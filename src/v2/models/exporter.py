@@ -0,0 +1,148 @@
+import gzip
+import io
+import shutil
+import tempfile
+import zipfile
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Nombre de lignes reconstruites et écrites à la fois
+EXPORT_CHUNK_ROWS = 100_000
+# Au-delà de cette taille (en Mo), le fichier temporaire est écrit sur disque
+SPOOL_MAX_MB = 64
+
+# Format : (libellé, extension, type MIME)
+EXPORT_FORMATS = {
+    "csv": ("CSV", ".csv", "text/csv"),
+    "csv.gz": ("CSV compressé (gzip)", ".csv.gz", "application/gzip"),
+    "parquet": ("Parquet", ".parquet", "application/vnd.apache.parquet"),
+    "feather": ("Feather", ".feather", "application/octet-stream"),
+}
+
+
+def export_file_name(method_name, fmt, prefix="dataset_imputed"):
+    return f"{prefix}_{method_name.replace(' ', '_')}{EXPORT_FORMATS[fmt][1]}"
+
+
+def write_result(result, fmt, fileobj, chunk_size=EXPORT_CHUNK_ROWS):
+    """Écrit le DataFrame imputé dans fileobj (binaire), bloc par bloc : seul un
+    bloc de lignes est reconstruit en mémoire à la fois"""
+    with ChunkWriter(fmt, fileobj) as writer:
+        for chunk in result.iter_chunks(chunk_size):
+            writer.write(chunk)
+
+
+def write_archive(results, fmt, fileobj, chunk_size=EXPORT_CHUNK_ROWS):
+    """Archive zip contenant le résultat de chaque méthode"""
+    # Les formats compressés ne gagnent rien à être recompressés
+    compression = zipfile.ZIP_DEFLATED if fmt == "csv" else zipfile.ZIP_STORED
+
+    with zipfile.ZipFile(fileobj, "w", compression=compression) as archive:
+        for method_name, result in results.items():
+            with spooled_export(
+                lambda f: write_result(result, fmt, f, chunk_size)
+            ) as spool, archive.open(export_file_name(method_name, fmt), "w") as entry:
+                shutil.copyfileobj(spool, entry)
+
+
+def spooled_export(write):
+    """Fichier temporaire (en mémoire puis sur disque) rempli par write(fileobj)
+    et repositionné au début"""
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MB * 1024**2)
+    try:
+        write(spool)
+    except Exception:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool
+
+
+def download_file(write):
+    """Fichier temporaire sur disque rempli par write(fileobj), renvoyé non
+    bufferisé et repositionné au début : st.download_button le lit directement,
+    sans copie complète en mémoire au préalable"""
+    raw = tempfile.TemporaryFile(buffering=0)
+    fileobj = io.BufferedWriter(raw)
+    try:
+        write(fileobj)
+        fileobj.flush()
+    except Exception:
+        raw.close()
+        raise
+    fileobj.detach()
+    raw.seek(0)
+    return raw
+
+
+def result_file(result, fmt):
+    return download_file(lambda f: write_result(result, fmt, f))
+
+
+def archive_file(results, fmt):
+    return download_file(lambda f: write_archive(results, fmt, f))
+
+
+class ChunkWriter:
+    """Écriture incrémentale de blocs de lignes (même schéma) dans fileobj"""
+
+    def __init__(self, fmt, fileobj):
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Format d'export inconnu : {fmt}")
+        self.fmt = fmt
+        self.fileobj = fileobj
+        self._gzip = None
+        self._writer = None
+        self._schema = None
+        self._header = True
+
+        if fmt == "csv.gz":
+            self._gzip = gzip.GzipFile(fileobj=fileobj, mode="wb")
+
+    def write(self, chunk):
+        if self.fmt in ("csv", "csv.gz"):
+            sink = self._gzip if self._gzip is not None else self.fileobj
+            sink.write(chunk.to_csv(index=False, header=self._header).encode("utf-8"))
+            self._header = False
+            return
+
+        if self._writer is None:
+            self._schema = _arrow_schema(chunk)
+            self._writer = self._open_arrow_writer()
+        self._writer.write_table(
+            pa.Table.from_pandas(chunk, schema=self._schema, preserve_index=False)
+        )
+
+    def _open_arrow_writer(self):
+        if self.fmt == "parquet":
+            return pq.ParquetWriter(self.fileobj, self._schema)
+
+        # Feather v2 = format fichier Arrow IPC
+        compression = "lz4" if pa.Codec.is_available("lz4") else None
+        return pa.ipc.new_file(
+            self.fileobj,
+            self._schema,
+            options=pa.ipc.IpcWriteOptions(compression=compression),
+        )
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        if self._gzip is not None:
+            self._gzip.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _arrow_schema(chunk):
+    # Colonne entièrement vide dans le premier bloc : type texte par défaut
+    schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+    for i, field in enumerate(schema):
+        if pa.types.is_null(field.type):
+            schema = schema.set(i, field.with_type(pa.string()))
+    return schema
@@ -0,0 +1,309 @@
+import copy
+import pickle
+
+import numpy as np
+import pandas as pd
+from miceforest import ImputationKernel
+from sklearn.impute import SimpleImputer
+
+from .grouped_imputer import GroupedImputer
+from .imputation_result import ImputationResult
+from .knn_imputer import BlockwiseKNNImputer
+
+# Au-delà de ce nombre de modalités, une variable catégorielle est passée à
+# MICE Forest sous forme de codes numériques (le modèle multiclasse échoue)
+MICE_MAX_CATEGORIES = 32
+
+
+class FittedImputer:
+    """Imputeur entraîné une seule fois puis réutilisable sur de nouveaux lots
+
+    L'artefact sérialisable contient tout ce qui est appris au fit : statistiques
+    des colonnes (SimpleImputer), matrice de référence (KNN), modèles du
+    kernel MICE et catégories des variables catégorielles.
+
+    Avec config["group_by"] (méthodes simples et KNN), l'imputation est faite
+    par strates (GroupedImputer), les statistiques globales servant de repli.
+    """
+
+    def __init__(self, config, n_jobs=1):
+        self.config = config
+        # Processus pour imputer les groupes en parallèle (imputation par strates)
+        self.n_jobs = n_jobs
+        self.columns = []
+        self.numeric_cols = []
+        self.categorical_cols = []
+        self.numeric_imputer = None
+        self.categorical_fill = {}
+        self.grouped = None
+        self.kernel = None
+        # Catégories apprises au fit, par colonne catégorielle
+        self.categories = {}
+        # Variables catégorielles à forte cardinalité, imputées via leurs codes
+        self.coded_cols = []
+        # Chaînes MICE indépendantes dont les imputations sont combinées
+        self.chains = []
+
+    @staticmethod
+    def chain_config(config, chain):
+        """Configuration d'une chaîne MICE : une seule chaîne, graine décalée
+
+        Le nombre de chaînes et leur regroupement, appliqué une fois les
+        chaînes terminées, sont retirés : les clés de cache d'une chaîne n'en
+        dépendent pas.
+        """
+        return {
+            **{
+                key: value
+                for key, value in config.items()
+                if key not in ("chains", "pooling")
+            },
+            "random_state": config.get("random_state", 42) + chain,
+        }
+
+    @classmethod
+    def from_chains(cls, config, chains):
+        """Imputeur combinant des chaînes MICE entraînées séparément"""
+        fitted = cls(config)
+        fitted.columns = chains[0].columns
+        fitted.numeric_cols = chains[0].numeric_cols
+        fitted.categorical_cols = chains[0].categorical_cols
+        fitted.chains = chains
+        return fitted
+
+    def fit(self, df):
+        if self.config["type"] == "miceforest":
+            self.fit_transform(df)
+            return self
+        return self._fit(df)
+
+    def fit_transform(self, df):
+        if self.config["type"] != "miceforest":
+            return self._fit(df).transform(df)
+
+        self._set_columns(df)
+        if self.config.get("chains", 1) > 1:
+            self.chains = [
+                FittedImputer(self.chain_config(self.config, chain))
+                for chain in range(self.config["chains"])
+            ]
+            return self._pool(df, [chain.fit_transform(df) for chain in self.chains])
+        return self._fit_miceforest(df)
+
+    def _set_columns(self, df):
+        self.columns = list(df.columns)
+        self.numeric_cols = list(df.select_dtypes(include=[np.number]).columns)
+        self.categorical_cols = list(
+            df.select_dtypes(include=["object", "category"]).columns
+        )
+
+    def _fit(self, df):
+        """Statistiques des méthodes simples et KNN (sans imputer df)"""
+        self._set_columns(df)
+
+        # Colonnes numériques
+        if len(self.numeric_cols) > 0:
+            if self.config["type"] == "simple":
+                self.numeric_imputer = SimpleImputer(strategy=self.config["strategy"])
+            elif self.config["type"] == "knn":
+                self.numeric_imputer = BlockwiseKNNImputer(
+                    n_neighbors=self.config["n_neighbors"]
+                )
+            self.numeric_imputer.fit(df[self.numeric_cols])
+
+        # Colonnes catégorielles : le mode appris sur les données d'entraînement
+        for col in self.categorical_cols:
+            mode_value = df[col].mode()
+            self.categorical_fill[col] = (
+                mode_value[0] if len(mode_value) > 0 else "Unknown"
+            )
+
+        # Imputation par strates ; les statistiques globales ci-dessus servent
+        # de repli pour les petits groupes et les colonnes de stratification
+        if self.config.get("group_by"):
+            self.grouped = GroupedImputer(self.config, self.n_jobs).fit(
+                df, self.numeric_cols, self.categorical_cols
+            )
+
+        return self
+
+    def transform(self, df):
+        df = self._select_columns(df)
+
+        if self.chains:
+            return self._pool(df, [chain.transform(df) for chain in self.chains])
+
+        if self.config["type"] == "miceforest":
+            return self._transform_miceforest(df)
+
+        if self.grouped is not None:
+            df_imputed = self.grouped.transform(df)
+        else:
+            df_imputed = df.copy()
+
+        if self.numeric_imputer is not None:
+            df_imputed[self.numeric_cols] = self.numeric_imputer.transform(
+                df_imputed[self.numeric_cols]
+            )
+
+        for col, fill_value in self.categorical_fill.items():
+            if df_imputed[col].isnull().any():
+                if isinstance(df_imputed[col].dtype, pd.CategoricalDtype) and (
+                    fill_value not in df_imputed[col].cat.categories
+                ):
+                    df_imputed[col] = df_imputed[col].cat.add_categories(fill_value)
+                df_imputed[col] = df_imputed[col].fillna(fill_value)
+
+        return self._restore_numeric_dtypes(df_imputed, df)
+
+    def _restore_numeric_dtypes(self, df_imputed, df):
+        """Les imputeurs renvoient des float64 : retour aux types d'origine
+        (ex : types compacts float32, Int8), arrondis pour les entiers"""
+        for col in self.numeric_cols:
+            dtype = df[col].dtype
+            if df_imputed[col].dtype == dtype:
+                continue
+            values = df_imputed[col]
+            if pd.api.types.is_integer_dtype(dtype):
+                values = values.round()
+            df_imputed[col] = values.astype(dtype)
+        return df_imputed
+
+    @staticmethod
+    def _pool(df, imputed_dfs):
+        results = [ImputationResult.from_frame(df, imputed) for imputed in imputed_dfs]
+        return ImputationResult.pool(results).to_frame()
+
+    def with_iterations(self, df, iterations):
+        """Imputeur MICE partageant ce kernel, pour un autre nombre d'itérations
+
+        Seules les itérations au-delà de celles déjà exécutées par le kernel sont
+        calculées ; en deçà, les données de l'itération demandée sont reprises.
+        """
+        fitted = copy.copy(self)
+        fitted.config = {**self.config, "iterations": iterations}
+        return fitted, fitted._run_miceforest(df)
+
+    def _fit_miceforest(self, df):
+        df_prep = self._encode(df, fit=True)
+
+        # Initialiser MICE Forest (données de chaque itération conservées) ;
+        # df_prep est une copie propre à l'imputeur : pas de copie supplémentaire
+        self.kernel = ImputationKernel(
+            data=df_prep,
+            save_all_iterations_data=True,
+            copy_data=False,
+            random_state=self.config.get("random_state", 42),
+        )
+
+        return self._run_miceforest(df)
+
+    def _run_miceforest(self, df):
+        iterations = self.config["iterations"]
+
+        # Effectuer l'imputation avec burn-in (itérations manquantes uniquement)
+        extra_iterations = iterations - self.kernel.iteration_count()
+        if extra_iterations > 0:
+            self.kernel.mice(iterations=extra_iterations, verbose=False)
+
+        return self._decode(self.kernel.complete_data(0, iteration=iterations), df)
+
+    def _transform_miceforest(self, df):
+        imputed = self.kernel.impute_new_data(
+            self._encode(df),
+            iterations=self.config["iterations"],
+            copy_data=False,
+            random_state=self.config.get("random_state", 42),
+        )
+        return self._decode(imputed.complete_data(0), df)
+
+    def _encode(self, df, fit=False):
+        """Convertit les variables catégorielles en dtype category, géré
+        nativement par MICE Forest (catégories apprises au fit), ou en codes
+        numériques au-delà de MICE_MAX_CATEGORIES modalités"""
+        # MICE Forest attend un index 0..n-1 (l'index d'origine est restauré au décodage)
+        df_prep = df.reset_index(drop=True)
+
+        for col in self.categorical_cols:
+            if fit:
+                self.categories[col] = (
+                    df_prep[col].cat.categories
+                    if isinstance(df_prep[col].dtype, pd.CategoricalDtype)
+                    else pd.Index(df_prep[col].dropna().unique())
+                )
+                if len(self.categories[col]) > MICE_MAX_CATEGORIES:
+                    self.coded_cols.append(col)
+
+            # Valeurs inconnues des catégories apprises -> NaN
+            dtype = pd.CategoricalDtype(self.categories[col])
+            if dtype != df_prep[col].dtype:
+                df_prep[col] = df_prep[col].astype(dtype)
+
+            if col in self.coded_cols:
+                codes = df_prep[col].cat.codes.to_numpy(dtype=float)
+                codes[codes < 0] = np.nan
+                df_prep[col] = codes
+
+        return df_prep
+
+    def _decode(self, df_imputed, df):
+        """Restaure les types d'origine après imputation"""
+        for col in self.coded_cols:
+            # Codes imputés : arrondis au code valide le plus proche
+            codes = df_imputed[col].to_numpy(dtype=float)
+            valid = ~np.isnan(codes)
+            codes[valid] = np.clip(
+                np.rint(codes[valid]), 0, len(self.categories[col]) - 1
+            )
+            df_imputed[col] = pd.Categorical.from_codes(
+                np.where(valid, codes, -1).astype(int),
+                dtype=pd.CategoricalDtype(self.categories[col]),
+            )
+
+        for col in self.categorical_cols:
+            # Colonnes texte : retour au type object ; les colonnes category
+            # conservent les catégories apprises
+            if not isinstance(df[col].dtype, pd.CategoricalDtype):
+                df_imputed[col] = df_imputed[col].astype(df[col].dtype)
+
+        df_imputed.index = df.index
+        return df_imputed
+
+    @property
+    def nbytes(self):
+        """Taille approximative des données conservées par l'imputeur"""
+        if self.chains:
+            return sum(chain.nbytes for chain in self.chains)
+        if self.kernel is not None:
+            # Données encodées et imputations conservées pour chaque itération
+            return int(
+                self.kernel.working_data.memory_usage(deep=True).sum()
+                + sum(
+                    values.memory_usage(deep=True).sum()
+                    for values in self.kernel.imputation_values.values()
+                )
+            )
+        nbytes = self.grouped.nbytes if self.grouped is not None else 0
+        if isinstance(self.numeric_imputer, BlockwiseKNNImputer):
+            nbytes += self.numeric_imputer._fit_X.nbytes
+        return nbytes
+
+    def _select_columns(self, df):
+        missing_cols = [col for col in self.columns if col not in df.columns]
+        if missing_cols:
+            raise ValueError(f"Colonnes absentes du nouveau lot : {missing_cols}")
+        if list(df.columns) == self.columns:
+            return df
+        return df[self.columns]
+
+    def to_bytes(self):
+        return pickle.dumps(self)
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            pickle.dump(self, f)
+
+    @staticmethod
+    def load(path):
+        with open(path, "rb") as f:
+            return pickle.load(f)
@@ -0,0 +1,167 @@
+import numpy as np
+import pandas as pd
+
+from .executor import get_executor
+from .knn_imputer import BlockwiseKNNImputer
+
+# En deçà de ce nombre de valeurs connues, un groupe utilise les statistiques
+# globales
+MIN_GROUP_SIZE = 30
+
+
+def _impute_group(imputer, X):
+    return imputer.transform(X)
+
+
+class GroupedImputer:
+    """Imputation par strates : chaque groupe défini par les colonnes group_by
+    est imputé indépendamment
+
+    Stratégies simples : moyenne / médiane / mode de chaque groupe, calculés en
+    une agrégation vectorisée. KNN : un imputeur par groupe, les donneurs étant
+    pris dans le groupe ; les groupes sont répartis entre n_jobs processus.
+    Les cellules des groupes trop petits (ou absents du fit) ne sont pas
+    remplies ici : l'imputeur global s'en charge.
+    """
+
+    def __init__(self, config, n_jobs=1):
+        self.config = config
+        self.group_by = list(config["group_by"])
+        self.min_group_size = config.get("min_group_size", MIN_GROUP_SIZE)
+        self.n_jobs = n_jobs
+        self.numeric_cols = []
+        self.categorical_cols = []
+        # Clés de chaque groupe (une ligne par identifiant de groupe)
+        self.groups = None
+        # Valeurs de remplissage par groupe (NaN : statistique globale)
+        self.fill_values = None
+        # Imputeurs KNN des groupes assez grands, par identifiant de groupe
+        self.knn_imputers = {}
+
+    def fit(self, df, numeric_cols, categorical_cols):
+        self.numeric_cols = [col for col in numeric_cols if col not in self.group_by]
+        self.categorical_cols = [
+            col for col in categorical_cols if col not in self.group_by
+        ]
+
+        ids = df.groupby(
+            self.group_by, observed=True, dropna=False, sort=False
+        ).ngroup()
+        ids = ids.to_numpy()
+        first_rows = np.unique(ids, return_index=True)[1]
+        self.groups = df[self.group_by].iloc[first_rows].reset_index(drop=True)
+
+        fill_values = {}
+        if self.config["type"] == "knn":
+            self._fit_knn(df, ids)
+        elif self.config["strategy"] == "most_frequent":
+            for col in self.numeric_cols:
+                fill_values[col] = self._group_modes(df[col], ids)
+        elif self.numeric_cols:
+            grouped = df[self.numeric_cols].groupby(ids)
+            stats = grouped.agg(self.config["strategy"])
+            stats = stats.where(grouped.count() >= self.min_group_size)
+            for col in self.numeric_cols:
+                fill_values[col] = stats[col]
+
+        for col in self.categorical_cols:
+            fill_values[col] = self._group_modes(df[col], ids)
+
+        self.fill_values = pd.DataFrame(fill_values, index=range(len(self.groups)))
+        return self
+
+    def _fit_knn(self, df, ids):
+        X = df[self.numeric_cols].to_numpy(dtype=float, na_value=np.nan)
+        order = np.argsort(ids, kind="stable")
+        group_ids, starts = np.unique(ids[order], return_index=True)
+
+        for group_id, rows in zip(group_ids, np.split(order, starts[1:])):
+            if len(rows) >= max(self.min_group_size, self.config["n_neighbors"] + 1):
+                self.knn_imputers[group_id] = BlockwiseKNNImputer(
+                    n_neighbors=self.config["n_neighbors"]
+                ).fit(X[rows])
+
+    def _group_modes(self, series, ids):
+        """Mode de la colonne dans chaque groupe (vectorisé)"""
+        known = series.notna().to_numpy()
+        counts = (
+            pd.DataFrame({"group": ids[known], "value": series.to_numpy()[known]})
+            .value_counts(sort=False)
+            .reset_index(name="count")
+        )
+        # Égalités : plus petite valeur, comme SimpleImputer (colonnes numériques)
+        if pd.api.types.is_numeric_dtype(series):
+            order = counts.sort_values(
+                ["count", "value"], ascending=[False, True], kind="stable"
+            )
+        else:
+            order = counts.sort_values("count", ascending=False, kind="stable")
+        modes = order.drop_duplicates("group").set_index("group")
+        n_known = counts.groupby("group")["count"].sum()
+        modes = modes["value"].where(
+            n_known.reindex(modes.index) >= self.min_group_size
+        )
+        return modes.reindex(range(len(self.groups)))
+
+    def group_ids(self, df):
+        """Identifiant du groupe de chaque ligne (-1 : groupe inconnu au fit)"""
+        keys = self.groups.assign(_group_id=np.arange(len(self.groups)))
+        matched = df[self.group_by].merge(keys, on=self.group_by, how="left")
+        return matched["_group_id"].fillna(-1).to_numpy(dtype=int)
+
+    def transform(self, df):
+        """Remplit les cellules manquantes à partir des groupes ; les colonnes
+        numériques sont renvoyées en flottants"""
+        df_imputed = df.copy()
+        ids = self.group_ids(df)
+        known = ids >= 0
+
+        if self.config["type"] == "knn" and self.numeric_cols:
+            df_imputed[self.numeric_cols] = self._transform_knn(df, ids)
+
+        for col in self.fill_values.columns:
+            missing = df_imputed[col].isna().to_numpy() & known
+            if not missing.any():
+                continue
+
+            values = self.fill_values[col].to_numpy()[ids[missing]]
+            if col in self.numeric_cols:
+                column = df_imputed[col].to_numpy(dtype=float, na_value=np.nan)
+                column[missing] = values.astype(float)
+                df_imputed[col] = column
+            else:
+                filled = pd.Series(values, index=df_imputed.index[missing])
+                df_imputed[col] = df_imputed[col].fillna(filled)
+
+        return df_imputed
+
+    def _transform_knn(self, df, ids):
+        X = df[self.numeric_cols].to_numpy(dtype=float, na_value=np.nan)
+        receivers = np.flatnonzero(np.isnan(X).any(axis=1))
+
+        # Lignes à imputer de chaque groupe disposant d'un imputeur
+        order = receivers[np.argsort(ids[receivers], kind="stable")]
+        group_ids, starts = np.unique(ids[order], return_index=True)
+        blocks = {
+            group_id: rows
+            for group_id, rows in zip(group_ids, np.split(order, starts[1:]))
+            if group_id in self.knn_imputers
+        }
+        if not blocks:
+            return X
+
+        imputers = [self.knn_imputers[group_id] for group_id in blocks]
+        inputs = [X[rows] for rows in blocks.values()]
+        if self.n_jobs > 1 and len(blocks) > 1:
+            executor = get_executor(min(self.n_jobs, len(blocks)))
+            outputs = executor.map(_impute_group, imputers, inputs)
+        else:
+            outputs = map(_impute_group, imputers, inputs)
+
+        for rows, imputed in zip(blocks.values(), outputs):
+            X[rows] = imputed
+        return X
+
+    @property
+    def nbytes(self):
+        return sum(imputer._fit_X.nbytes for imputer in self.knn_imputers.values())
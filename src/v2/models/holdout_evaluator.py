@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+
+from .executor import get_executor
+from .fitted_imputer import FittedImputer
+
+
+def _run_holdout_repeat(df, methods, fraction, seed):
+    """Masque une fraction des cellules connues, impute avec chaque méthode et
+    renvoie les coordonnées masquées, les vraies valeurs et les prédictions"""
+    rng = np.random.default_rng(seed)
+    hidden = df.notnull().to_numpy() & (rng.random(df.shape) < fraction)
+    rows, cols = np.nonzero(hidden)
+
+    # Cellules regroupées par colonne
+    order = np.argsort(cols, kind="stable")
+    rows, cols = rows[order], cols[order]
+
+    masked_df = df.mask(hidden)
+    truth = _values_at(df, rows, cols)
+
+    predictions = {}
+    for method_name, config in methods.items():
+        imputed_df = FittedImputer(config).fit_transform(masked_df)
+        predictions[method_name] = _values_at(imputed_df, rows, cols)
+
+    return cols, truth, predictions
+
+
+def _values_at(df, rows, cols):
+    values = np.empty(len(rows), dtype=object)
+    for col_idx in np.unique(cols):
+        in_col = cols == col_idx
+        series = df.iloc[rows[in_col], col_idx]
+        if pd.api.types.is_numeric_dtype(series):
+            values[in_col] = series.to_numpy(dtype=float, na_value=np.nan)
+        else:
+            values[in_col] = series.to_numpy()
+    return values
+
+
+class HoldoutEvaluator:
+    """Évaluation de la précision des méthodes par masquage de cellules connues
+
+    Une fraction des valeurs connues est masquée, chaque méthode l'impute et
+    on mesure RMSE/MAE (colonnes numériques) ou l'exactitude (colonnes
+    catégorielles). L'opération est répétée sur plusieurs masques, exécutés en
+    parallèle ; le score de toutes les méthodes et colonnes est calculé en une
+    passe vectorisée par masque.
+    """
+
+    def __init__(self, df, methods, fraction=0.1, n_repeats=3, n_jobs=1, seed=42):
+        self.df = df
+        self.methods = methods
+        self.fraction = fraction
+        self.n_repeats = n_repeats
+        self.n_jobs = n_jobs
+        self.seed = seed
+
+    def evaluate(self):
+        seeds = [self.seed + i for i in range(self.n_repeats)]
+
+        if self.n_jobs > 1 and self.n_repeats > 1:
+            executor = get_executor(min(self.n_jobs, self.n_repeats))
+            repeats = executor.map(
+                _run_holdout_repeat,
+                [self.df] * self.n_repeats,
+                [self.methods] * self.n_repeats,
+                [self.fraction] * self.n_repeats,
+                seeds,
+            )
+        else:
+            repeats = (
+                _run_holdout_repeat(self.df, self.methods, self.fraction, seed)
+                for seed in seeds
+            )
+
+        scores = [self._score(*repeat) for repeat in repeats]
+        return self._aggregate(scores)
+
+    def _score(self, cols, truth, predictions):
+        """Scores (méthode x colonne) d'un masque, en une passe vectorisée"""
+        method_names = list(predictions)
+        numeric = np.array(
+            [pd.api.types.is_numeric_dtype(dtype) for dtype in self.df.dtypes]
+        )
+        records = []
+
+        # Colonnes numériques : erreurs de toutes les méthodes en une matrice
+        num_cells = numeric[cols]
+        if num_cells.any():
+            num_cols = cols[num_cells]
+            y_true = truth[num_cells].astype(float)
+            y_pred = np.vstack(
+                [predictions[m][num_cells].astype(float) for m in method_names]
+            )
+            errors = y_pred - y_true
+
+            col_ids, starts, counts = np.unique(
+                num_cols, return_index=True, return_counts=True
+            )
+            rmse = np.sqrt(np.add.reduceat(errors**2, starts, axis=1) / counts)
+            mae = np.add.reduceat(np.abs(errors), starts, axis=1) / counts
+
+            for i, method_name in enumerate(method_names):
+                for j, col_idx in enumerate(col_ids):
+                    column = self.df.columns[col_idx]
+                    records.append((method_name, column, "RMSE", rmse[i, j]))
+                    records.append((method_name, column, "MAE", mae[i, j]))
+
+        # Colonnes catégorielles : exactitude
+        cat_cells = ~num_cells
+        if cat_cells.any():
+            cat_cols = cols[cat_cells]
+            y_true = truth[cat_cells]
+            hits = np.vstack(
+                [predictions[m][cat_cells] == y_true for m in method_names]
+            )
+
+            col_ids, starts, counts = np.unique(
+                cat_cols, return_index=True, return_counts=True
+            )
+            accuracy = np.add.reduceat(hits.astype(float), starts, axis=1) / counts
+
+            for i, method_name in enumerate(method_names):
+                for j, col_idx in enumerate(col_ids):
+                    column = self.df.columns[col_idx]
+                    records.append((method_name, column, "Exactitude", accuracy[i, j]))
+
+        return pd.DataFrame(
+            records, columns=["Méthode", "Colonne", "Métrique", "Score"]
+        )
+
+    def _aggregate(self, scores):
+        all_scores = pd.concat(scores, ignore_index=True)
+        summary = (
+            all_scores.groupby(["Méthode", "Colonne", "Métrique"], sort=False)["Score"]
+            .agg(["mean", "std"])
+            .reset_index()
+            .rename(columns={"mean": "Moyenne", "std": "Écart-type"})
+        )
+        return summary
@@ -1,25 +1,95 @@
+import copy
+import json
+import os
+import threading
 import warnings
+from concurrent.futures import as_completed
 
-import numpy as np
-import pandas as pd
 import streamlit as st
-from miceforest import ImputationKernel
-from sklearn.impute import KNNImputer, SimpleImputer
-from sklearn.preprocessing import LabelEncoder
+
+from .cache import LRUCache, hash_dataframe
+from .executor import get_executor
+from .fitted_imputer import FittedImputer
+from .grouped_imputer import MIN_GROUP_SIZE
+from .imputation_result import ImputationResult
+from .instrumentation import measure
 
 warnings.filterwarnings("ignore")
 
 
+IMPUTATION_METHODS = {
+    "Simple - Mean": {"type": "simple", "strategy": "mean"},
+    "Simple - Median": {"type": "simple", "strategy": "median"},
+    "Simple - Mode": {"type": "simple", "strategy": "most_frequent"},
+    "KNN": {"type": "knn", "n_neighbors": 5},
+    "MICE Forest": {
+        "type": "miceforest",
+        "iterations": 5,
+        "chains": 1,
+        "pooling": "mean",
+    },
+}
+
+# Regroupement des chaînes MICE : estimation combinée ou jeux de données séparés
+POOLING_OPTIONS = {
+    "mean": "Estimation combinée (moyenne / vote majoritaire)",
+    "none": "Jeux de données séparés",
+}
+
+# Kernels MICE entraînés, par (données, configuration hors nombre d'itérations) :
+# changer le nombre d'itérations reprend le kernel au lieu de tout recalculer
+# Partagés entre les sessions : budget mémoire en Mo (données encodées et
+# imputations de chaque itération)
+MICE_KERNEL_CACHE_MAX_MB = int(os.environ.get("IMPUTATION_KERNEL_CACHE_MAX_MB", "1024"))
+_MICE_KERNELS = LRUCache(
+    MICE_KERNEL_CACHE_MAX_MB * 1024 * 1024, sizeof=lambda fitted: fitted.nbytes
+)
+# Un verrou par kernel : deux sessions ne relancent pas mice() sur le même kernel
+_KERNEL_LOCKS = {}
+_KERNEL_LOCKS_GUARD = threading.Lock()
+
+
+def _run_imputation(df, config, track_memory=False):
+    """Exécute une méthode dans un processus de calcul (durée et pic mémoire
+    mesurés dans ce processus)"""
+    with measure(track_memory) as stats:
+        result, fitted = ImputationEngine(df)._fit_imputer(config)
+    return result, fitted, stats
+
+
+def _kernel_lock(key):
+    with _KERNEL_LOCKS_GUARD:
+        # Verrous des kernels sortis du cache (et libres) retirés : le nombre de
+        # verrous reste borné par celui des kernels en cache
+        for stale in [
+            other
+            for other, lock in _KERNEL_LOCKS.items()
+            if other != key and other not in _MICE_KERNELS and not lock.locked()
+        ]:
+            del _KERNEL_LOCKS[stale]
+        return _KERNEL_LOCKS.setdefault(key, threading.Lock())
+
+
+def _kernel_config(config):
+    return json.dumps(
+        {key: value for key, value in config.items() if key != "iterations"},
+        sort_keys=True,
+    )
+
+
 class ImputationEngine:
-    def __init__(self, df):
+    def __init__(self, df, n_jobs=1, instrumentation=None, result_cache=None):
         self.df = df
-        self.methods = {
-            "Simple - Mean": {"type": "simple", "strategy": "mean"},
-            "Simple - Median": {"type": "simple", "strategy": "median"},
-            "Simple - Mode": {"type": "simple", "strategy": "most_frequent"},
-            "KNN": {"type": "knn", "n_neighbors": 5},
-            "MICE Forest": {"type": "miceforest", "iterations": 5},
-        }
+        # Nombre de processus pour exécuter les méthodes en parallèle
+        self.n_jobs = n_jobs
+        # Mesures par méthode (Instrumentation), facultatives
+        self.instrumentation = instrumentation
+        # Résultats déjà calculés (LRUCache), par (données, configuration)
+        self.result_cache = result_cache
+        # Imputeurs entraînés lors de la dernière exécution, par méthode
+        self.fitted_imputers = {}
+        self.methods = IMPUTATION_METHODS
+        self._data_hash = None
 
     def select_methods(self):
         st.subheader("Sélection des méthodes d'imputation")
@@ -47,6 +117,63 @@ class ImputationEngine:
                 )
                 method_configs[method]["iterations"] = iterations
 
+                chains = st.slider(
+                    f"Nombre de chaînes pour {method}",
+                    1,
+                    8,
+                    1,
+                    key=f"chains_{method}",
+                    help="Chaînes MICE indépendantes (graines différentes), "
+                    "exécutées en parallèle",
+                )
+                method_configs[method]["chains"] = chains
+                if chains > 1:
+                    method_configs[method]["pooling"] = st.radio(
+                        f"Résultat des chaînes pour {method}",
+                        options=list(POOLING_OPTIONS),
+                        format_func=POOLING_OPTIONS.get,
+                        key=f"pooling_{method}",
+                    )
+
+        # Imputation par strates (méthodes simples et KNN)
+        grouped_methods = [
+            method
+            for method, config in method_configs.items()
+            if config["type"] != "miceforest"
+        ]
+        if grouped_methods:
+            group_by = st.multiselect(
+                "Colonnes de stratification",
+                options=list(self.df.columns),
+                default=[],
+                help="Impute chaque groupe indépendamment (méthodes simples et "
+                "KNN) ; MICE Forest reste global",
+            )
+            if group_by:
+                min_group_size = st.number_input(
+                    "Taille minimale d'un groupe",
+                    min_value=1,
+                    value=MIN_GROUP_SIZE,
+                    help="Les groupes plus petits utilisent les statistiques "
+                    "globales",
+                )
+                for method in grouped_methods:
+                    method_configs[method]["group_by"] = group_by
+                    method_configs[method]["min_group_size"] = int(min_group_size)
+
+        max_jobs = os.cpu_count() or 1
+        n_tasks = len(self._tasks(method_configs))
+        grouped = any(config.get("group_by") for config in method_configs.values())
+        if (n_tasks > 1 or grouped) and max_jobs > 1:
+            self.n_jobs = st.slider(
+                "Nombre de processus parallèles",
+                1,
+                max_jobs,
+                min(n_tasks, max_jobs),
+                help="Exécute les méthodes (et les chaînes MICE) sélectionnées "
+                "simultanément, ainsi que les groupes d'une imputation par strates",
+            )
+
         return method_configs if selected_methods else None
 
     def execute_imputation(self, methods):
@@ -54,100 +181,259 @@ class ImputationEngine:
 
         results = {}
         progress_bar = st.progress(0)
+        output_names = self.output_names(methods)
+        n_tasks = len(self._tasks(methods))
 
-        for i, (method_name, config) in enumerate(methods.items()):
-            with st.spinner(f"Exécution de {method_name}..."):
-                try:
-                    imputed_df = self._apply_imputation(config)
-                    results[method_name] = imputed_df
+        if self.n_jobs > 1 and n_tasks > 1:
+            message = f"Exécution de {n_tasks} tâches en parallèle..."
+        else:
+            message = "Exécution des imputations..."
+
+        with st.spinner(message):
+            for i, (method_name, outcome) in enumerate(self.iter_imputations(methods)):
+                if isinstance(outcome, Exception):
+                    st.error(f"✗ Erreur avec {method_name}: {str(outcome)}")
+                else:
+                    results[method_name] = outcome
                     st.success(f"✓ {method_name} terminé")
-                except Exception as e:
-                    st.error(f"✗ Erreur avec {method_name}: {str(e)}")
 
-                progress_bar.progress((i + 1) / len(methods))
-
-        return results
+                progress_bar.progress(min((i + 1) / len(output_names), 1.0))
+
+        # Conserver l'ordre de sélection des méthodes
+        return {name: results[name] for name in output_names if name in results}
+
+    @classmethod
+    def output_names(cls, methods):
+        """Noms des résultats produits : une entrée par méthode, ou une par
+        chaîne pour MICE sans regroupement"""
+        names = []
+        for method_name, config in methods.items():
+            if cls._n_chains(config) > 1 and config.get("pooling") == "none":
+                names.extend(
+                    cls._chain_name(method_name, chain)
+                    for chain in range(config["chains"])
+                )
+            else:
+                names.append(method_name)
+        return names
+
+    def iter_imputations(self, methods):
+        """Exécute les méthodes sans affichage et renvoie (méthode,
+        ImputationResult ou exception) au fur et à mesure qu'elles se terminent
+
+        Les chaînes MICE sont des tâches indépendantes ; elles sont regroupées
+        (ou renvoyées séparément) une fois toutes terminées.
+        """
+        chain_outcomes = {}
+
+        for (method_name, chain), outcome in self._run_tasks(self._tasks(methods)):
+            if chain is None:
+                yield self._collect(method_name, outcome)
+                continue
+
+            config = methods[method_name]
+            chain_outcomes.setdefault(method_name, {})[chain] = outcome
+            if len(chain_outcomes[method_name]) == config["chains"]:
+                outcomes = chain_outcomes.pop(method_name)
+                yield from self._collect_chains(
+                    method_name, config, [outcomes[i] for i in range(len(outcomes))]
+                )
 
-    def _apply_imputation(self, config):
-        df_imputed = self.df.copy()
+    def _tasks(self, methods):
+        """Tâches à exécuter : {(méthode, chaîne ou None): configuration}"""
+        tasks = {}
+        for method_name, config in methods.items():
+            if self._n_chains(config) > 1:
+                for chain in range(config["chains"]):
+                    tasks[(method_name, chain)] = FittedImputer.chain_config(
+                        config, chain
+                    )
+            else:
+                tasks[(method_name, None)] = config
+        return tasks
+
+    @staticmethod
+    def _n_chains(config):
+        return config.get("chains", 1) if config["type"] == "miceforest" else 1
+
+    @staticmethod
+    def _chain_name(method_name, chain):
+        return f"{method_name} #{chain + 1}"
+
+    def _run_tasks(self, tasks):
+        """Renvoie (tâche, (ImputationResult, imputeur) ou exception)"""
+        # Tâches déjà calculées sur ces données avec la même configuration
+        pending = {}
+        for task, config in tasks.items():
+            outcome = self._cached_result(config)
+            if outcome is not None:
+                yield task, outcome
+            else:
+                pending[task] = config
+        tasks = pending
+
+        track_memory = (
+            self.instrumentation is not None and self.instrumentation.track_memory
+        )
 
-        # Séparer les colonnes numériques et catégorielles
-        numeric_cols = df_imputed.select_dtypes(include=[np.number]).columns
-        categorical_cols = df_imputed.select_dtypes(include=["object"]).columns
+        if self.n_jobs > 1 and len(tasks) > 1:
+            executor = get_executor(min(self.n_jobs, len(tasks)))
+            futures = {}
+            resumed = {}
+            for task, config in tasks.items():
+                cached = self._cached_kernel(config)
+                if cached is not None:
+                    # Reprise d'un kernel MICE : sur place, sans le sérialiser
+                    resumed[task] = (config, cached)
+                else:
+                    future = executor.submit(
+                        _run_imputation, self.df, config, track_memory
+                    )
+                    futures[future] = task
+
+            for task, (config, cached) in resumed.items():
+                yield task, self._run_task(
+                    task,
+                    config,
+                    lambda: self._measured_fit(config, cached, track_memory),
+                )
+            for future in as_completed(futures):
+                task = futures[future]
+                yield task, self._run_task(task, tasks[task], future.result)
+        else:
+            for task, config in tasks.items():
+                cached = self._cached_kernel(config)
+                yield task, self._run_task(
+                    task,
+                    config,
+                    lambda: self._measured_fit(config, cached, track_memory),
+                )
 
+    def _measured_fit(self, config, cached, track_memory):
+        with measure(track_memory) as stats:
+            result, fitted = self._fit_imputer(config, cached)
+        return result, fitted, stats
+
+    def _run_task(self, task, config, compute):
+        try:
+            result, fitted, stats = compute()
+        except Exception as e:
+            return e
+
+        if self.instrumentation is not None:
+            method_name, chain = task
+            if chain is not None:
+                method_name = self._chain_name(method_name, chain)
+            self.instrumentation.record("Méthode", method_name, stats)
+
+        if self.result_cache is not None:
+            # Conservé sans la base : le cache ne retient pas de DataFrame
+            stored = copy.copy(result)
+            stored.base = None
+            self.result_cache.set(self._result_key(config), (stored, fitted))
+
+        # La base n'est pas renvoyée par les processus : on la rattache
+        result.base = self.df
         if config["type"] == "miceforest":
-            # Utiliser MICE Forest pour toutes les colonnes
-            df_imputed = self._apply_miceforest(df_imputed, config["iterations"])
+            _MICE_KERNELS.set(self._kernel_key(config), fitted)
+        return result, fitted
+
+    def _collect(self, method_name, outcome):
+        if isinstance(outcome, Exception):
+            return method_name, outcome
+
+        result, fitted = outcome
+        self.fitted_imputers[method_name] = fitted
+        return method_name, result
+
+    def _collect_chains(self, method_name, config, outcomes):
+        errors = [outcome for outcome in outcomes if isinstance(outcome, Exception)]
+        if errors:
+            yield method_name, errors[0]
+            return
+
+        if config.get("pooling") == "none":
+            # Imputations multiples : un résultat par chaîne
+            for chain, outcome in enumerate(outcomes):
+                yield self._collect(self._chain_name(method_name, chain), outcome)
         else:
-            # Traitement des colonnes numériques
-            if len(numeric_cols) > 0:
-                numeric_data = df_imputed[numeric_cols]
-
-                if config["type"] == "simple":
-                    imputer = SimpleImputer(strategy=config["strategy"])
-                    numeric_imputed = imputer.fit_transform(numeric_data)
-
-                elif config["type"] == "knn":
-                    imputer = KNNImputer(n_neighbors=config["n_neighbors"])
-                    numeric_imputed = imputer.fit_transform(numeric_data)
-
-                df_imputed[numeric_cols] = numeric_imputed
-
-            # Traitement des colonnes catégorielles
-            if len(categorical_cols) > 0:
-                for col in categorical_cols:
-                    if df_imputed[col].isnull().any():
-                        # Pour les variables catégorielles, utiliser le mode
-                        mode_value = df_imputed[col].mode()
-                        if len(mode_value) > 0:
-                            df_imputed[col].fillna(mode_value[0], inplace=True)
-                        else:
-                            df_imputed[col].fillna("Unknown", inplace=True)
-
-        return df_imputed
-
-    def _apply_miceforest(self, df, iterations):
-        # Préparer les données pour MICE Forest
-        df_prep = df.copy()
-
-        # Encoder les variables catégorielles
-        categorical_cols = df_prep.select_dtypes(include=["object"]).columns
-        label_encoders = {}
-
-        for col in categorical_cols:
-            if df_prep[col].isnull().any() or len(df_prep[col].unique()) > 1:
-                le = LabelEncoder()
-                # Fit sur les valeurs non nulles
-                non_null_values = df_prep[col].dropna()
-                if len(non_null_values) > 0:
-                    le.fit(non_null_values)
-                    # Transform en gardant les NaN
-                    mask = df_prep[col].notnull()
-                    df_prep.loc[mask, col] = le.transform(df_prep.loc[mask, col])
-                    label_encoders[col] = le
-
-        # Convertir tout en numérique
-        df_numeric = df_prep.apply(pd.to_numeric, errors="coerce")
-
-        # Initialiser et exécuter MICE Forest avec la syntaxe correcte
-        kernel = ImputationKernel(data=df_numeric, random_state=42)
-
-        # Effectuer l'imputation avec burn-in
-        kernel.mice(iterations=iterations, verbose=False)
-
-        # Récupérer les données imputées
-        df_imputed = kernel.complete_data(0)
-
-        # Décoder les variables catégorielles
-        for col, le in label_encoders.items():
-            # Arrondir et convertir en int pour le décodage
-            df_imputed[col] = df_imputed[col].round().astype(int)
-            # Clip aux valeurs valides
-            df_imputed[col] = df_imputed[col].clip(0, len(le.classes_) - 1)
-            # Décoder
-            df_imputed[col] = le.inverse_transform(df_imputed[col])
-
-        return df_imputed
+            result = ImputationResult.pool([result for result, _ in outcomes])
+            fitted = FittedImputer.from_chains(
+                config, [fitted for _, fitted in outcomes]
+            )
+            yield self._collect(method_name, (result, fitted))
+
+    def _data_key(self):
+        if self._data_hash is None:
+            self._data_hash = hash_dataframe(self.df)
+        return self._data_hash
+
+    def _kernel_key(self, config):
+        return self._data_key(), _kernel_config(config)
+
+    def _result_key(self, config):
+        return self._data_key(), json.dumps(config, sort_keys=True, default=str)
+
+    def comparison_key(self, methods, results):
+        """Clé des métriques de comparaison : données, configurations et
+        résultats obtenus (mêmes éléments que les clés des résultats)"""
+        return (
+            self._data_key(),
+            json.dumps(methods, sort_keys=True, default=str),
+            tuple(results),
+        )
+
+    def _cached_result(self, config):
+        if self.result_cache is None:
+            return None
+
+        entry = self.result_cache.get(self._result_key(config))
+        if entry is None:
+            return None
+
+        result, fitted = entry
+        result = copy.copy(result)
+        result.base = self.df
+        return result, fitted
+
+    def _cached_kernel(self, config):
+        if config["type"] != "miceforest":
+            return None
+        return _MICE_KERNELS.get(self._kernel_key(config))
+
+    def _fit_imputer(self, config, cached=None):
+        """Entraîne un imputeur réutilisable et impute les données courantes
+
+        Seules les cellules imputées sont conservées (ImputationResult). cached :
+        imputeur MICE déjà entraîné sur ces données, dont le kernel est repris.
+        """
+        if cached is not None:
+            with _kernel_lock(self._kernel_key(config)):
+                fitted, df_imputed = cached.with_iterations(
+                    self.df, config["iterations"]
+                )
+        else:
+            fitted = FittedImputer(config, n_jobs=self.n_jobs)
+            df_imputed = fitted.fit_transform(self.df)
+        return ImputationResult.from_frame(self.df, df_imputed), fitted
+
+    def export_fitted_imputers(self):
+        if not self.fitted_imputers:
+            return
+
+        st.write("**Imputeurs entraînés (réutilisables sur de nouveaux lots) :**")
+        cols = st.columns(len(self.fitted_imputers))
+
+        for col, (method_name, fitted) in zip(cols, self.fitted_imputers.items()):
+            with col:
+                st.download_button(
+                    label=f"📦 {method_name}",
+                    data=fitted.to_bytes,
+                    file_name=f"imputer_{method_name.replace(' ', '_')}.pkl",
+                    mime="application/octet-stream",
+                    key=f"fitted_{method_name}",
+                    on_click="ignore",
+                )
 
     def get_imputation_summary(self, original_df, imputed_df, method_name):
         summary = {
@@ -0,0 +1,132 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+
+class ImputationResult:
+    """Résultat d'une méthode : DataFrame de base partagé + cellules imputées
+
+    Seules les coordonnées des cellules manquantes de la base et leurs valeurs
+    imputées sont conservées (par colonne). Le DataFrame complet n'est
+    reconstruit qu'à la demande (export, aperçu).
+    """
+
+    def __init__(self, base, deltas, dtypes):
+        self.base = base
+        # {colonne: (positions des lignes, valeurs imputées)}
+        self.deltas = deltas
+        self.dtypes = dtypes
+
+    @classmethod
+    def from_frame(cls, base, imputed_df):
+        deltas = {}
+
+        for col in base.columns:
+            rows = np.flatnonzero(base[col].isnull().to_numpy())
+            if len(rows) > 0:
+                deltas[col] = (rows, imputed_df[col].iloc[rows].to_numpy())
+
+        return cls(base, deltas, imputed_df.dtypes.to_dict())
+
+    @classmethod
+    def pool(cls, results):
+        """Estimation combinée de plusieurs imputations des mêmes données : moyenne
+        pour les colonnes numériques, vote majoritaire pour les autres"""
+        first = results[0]
+        deltas = {}
+
+        for col, (rows, _) in first.deltas.items():
+            stacked = np.vstack([result.imputed_values(col) for result in results])
+
+            if pd.api.types.is_numeric_dtype(first.dtypes[col]):
+                with warnings.catch_warnings():
+                    # Cellule restée manquante dans toutes les chaînes
+                    warnings.simplefilter("ignore", RuntimeWarning)
+                    values = np.nanmean(stacked.astype(float), axis=0)
+                if pd.api.types.is_integer_dtype(first.dtypes[col]):
+                    values = np.round(values)
+            else:
+                # votes[i, j] : nombre d'imputations égales à la i-ème pour la
+                # cellule j (égalité : la première imputation l'emporte)
+                votes = np.stack([(stacked == row).sum(axis=0) for row in stacked])
+                values = stacked[votes.argmax(axis=0), np.arange(stacked.shape[1])]
+
+            deltas[col] = (rows, values)
+
+        return cls(first.base, deltas, first.dtypes)
+
+    def __getstate__(self):
+        # La base n'est pas sérialisée (retour des processus de calcul) :
+        # elle est rattachée par l'appelant
+        state = self.__dict__.copy()
+        state["base"] = None
+        return state
+
+    def imputed_values(self, col):
+        if col not in self.deltas:
+            return np.array([], dtype=object)
+        return self.deltas[col][1]
+
+    def observed_and_imputed(self, col):
+        """Valeurs non manquantes de la colonne imputée, sans la reconstruire"""
+        values = self.imputed_values(col)
+        values = values[~pd.isnull(values)]
+        observed = self.base[col].dropna().to_numpy()
+        dtype = float if pd.api.types.is_numeric_dtype(self.base[col]) else object
+        return np.concatenate([observed.astype(dtype), values.astype(dtype)])
+
+    def column_remaining_missing(self, col):
+        return int(pd.isnull(self.imputed_values(col)).sum())
+
+    def remaining_missing(self):
+        return sum(self.column_remaining_missing(col) for col in self.deltas)
+
+    def column(self, col, n_rows=None):
+        return self._column_slice(col, 0, n_rows)
+
+    def _column_slice(self, col, start, stop):
+        series = self.base[col].iloc[start:stop]
+
+        if col in self.deltas:
+            rows, values = self.deltas[col]
+            if start > 0 or stop is not None:
+                # Positions triées : bornes du bloc par recherche dichotomique
+                lo = np.searchsorted(rows, start)
+                hi = len(rows) if stop is None else np.searchsorted(rows, stop)
+                rows, values = rows[lo:hi] - start, values[lo:hi]
+
+            series = series.astype(self.dtypes[col])
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                new_categories = (
+                    pd.Index(values).dropna().difference(series.cat.categories)
+                )
+                if len(new_categories) > 0:
+                    series = series.cat.add_categories(new_categories)
+            series.iloc[rows] = values
+        elif self.dtypes.get(col, series.dtype) != series.dtype:
+            series = series.astype(self.dtypes[col])
+
+        return series
+
+    def to_frame(self):
+        return self.rows(0, None)
+
+    def head(self, n=5):
+        return self.rows(0, n)
+
+    def rows(self, start, stop):
+        """Lignes [start, stop) du DataFrame imputé"""
+        df = self.base.iloc[start:stop].copy()
+        for col in self.deltas:
+            df[col] = self._column_slice(col, start, stop)
+        return df
+
+    def iter_chunks(self, chunk_size):
+        """DataFrame imputé par blocs de chunk_size lignes (export en flux)"""
+        for start in range(0, max(len(self.base), 1), chunk_size):
+            yield self.rows(start, start + chunk_size)
+
+    @property
+    def nbytes(self):
+        return sum(rows.nbytes + values.nbytes for rows, values in self.deltas.values())
@@ -0,0 +1,187 @@
+import cProfile
+import json
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import pandas as pd
+import streamlit as st
+
+# Blocs mesurés ouverts, tous threads confondus : [mémoire au début, pic
+# observé]. Le pic de tracemalloc est global au processus : avant chaque
+# remise à zéro, il est reporté sur tous les blocs ouverts
+_open_blocks = {}
+# Nombre de blocs ayant besoin de tracemalloc : démarré par le premier bloc,
+# arrêté par le dernier (sauf s'il était déjà actif)
+_tracing_users = 0
+_tracing_started = False
+_tracing_lock = threading.Lock()
+
+RECORD_LABELS = {
+    "kind": "Type",
+    "name": "Nom",
+    "seconds": "Durée (s)",
+    "peak_mb": "Pic mémoire (Mo)",
+}
+
+PROFILE_LABELS = {
+    "function": "Fonction",
+    "ncalls": "Appels",
+    "tottime": "Temps propre (s)",
+    "cumtime": "Temps cumulé (s)",
+}
+
+
+@contextmanager
+def peak_memory(enabled=True):
+    """Pic d'allocation (Mo, tracemalloc) du bloc, renseigné dans stats["peak_mb"]
+
+    Les blocs peuvent être imbriqués ou ouverts depuis plusieurs threads : le
+    pic d'un bloc interne est reporté sur les blocs englobants (avec des blocs
+    concurrents, il inclut donc les allocations des autres threads).
+    """
+    stats = {}
+    if not enabled:
+        yield stats
+        return
+
+    global _tracing_users, _tracing_started
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracing_started = True
+        _tracing_users += 1
+
+        current, peak = tracemalloc.get_traced_memory()
+        for other in _open_blocks.values():
+            other[1] = max(other[1], peak)
+        tracemalloc.reset_peak()
+        block = [current, current]
+        _open_blocks[id(block)] = block
+
+    try:
+        yield stats
+    finally:
+        with _tracing_lock:
+            del _open_blocks[id(block)]
+            peak = max(tracemalloc.get_traced_memory()[1], block[1])
+            stats["peak_mb"] = (peak - block[0]) / 1024**2
+
+            _tracing_users -= 1
+            if _tracing_users == 0 and _tracing_started:
+                tracemalloc.stop()
+                _tracing_started = False
+
+
+@contextmanager
+def measure(track_memory=False):
+    """Durée du bloc (stats["seconds"]) et, si demandé, son pic mémoire"""
+    with peak_memory(track_memory) as stats:
+        start = time.perf_counter()
+        try:
+            yield stats
+        finally:
+            stats["seconds"] = time.perf_counter() - start
+
+
+class Instrumentation:
+    """Mesures d'une exécution : empreinte du dataset, durée et pic mémoire par
+    étape du pipeline et par méthode d'imputation, profil des fonctions
+
+    Le suivi des allocations (tracemalloc) et le profilage (cProfile) ralentissent
+    les calculs : ils ne sont actifs que si track_memory / profile sont demandés.
+    """
+
+    def __init__(self, track_memory=False, profile=False):
+        self.track_memory = track_memory
+        self.profiler = cProfile.Profile() if profile else None
+        self.timestamp = datetime.now(timezone.utc).isoformat()
+        # Empreinte mémoire réelle du dataset (memory_usage(deep=True))
+        self.dataset_bytes = None
+        self.records = []
+
+    @contextmanager
+    def stage(self, name, kind="Étape"):
+        with measure(self.track_memory) as stats:
+            yield
+        self.record(kind, name, stats)
+
+    def record(self, kind, name, stats):
+        self.records.append({"kind": kind, "name": name, **stats})
+
+    def start_profiling(self):
+        if self.profiler is not None:
+            self.profiler.enable()
+
+    def stop_profiling(self):
+        if self.profiler is not None:
+            self.profiler.disable()
+
+    def profile_report(self, limit=30):
+        """Fonctions les plus coûteuses (temps cumulé) du profil"""
+        if self.profiler is None:
+            return pd.DataFrame(columns=list(PROFILE_LABELS))
+
+        rows = [
+            {
+                "function": f"{func} ({file}:{line})",
+                "ncalls": ncalls,
+                "tottime": tottime,
+                "cumtime": cumtime,
+            }
+            for (file, line, func), (_, ncalls, tottime, cumtime, _) in pstats.Stats(
+                self.profiler
+            ).stats.items()
+        ]
+        report = pd.DataFrame(rows, columns=list(PROFILE_LABELS))
+        return report.sort_values("cumtime", ascending=False).head(limit)
+
+    def to_frame(self):
+        return pd.DataFrame(self.records, columns=list(RECORD_LABELS)).rename(
+            columns=RECORD_LABELS
+        )
+
+    def to_dict(self):
+        data = {
+            "timestamp": self.timestamp,
+            "dataset_bytes": self.dataset_bytes,
+            "records": self.records,
+        }
+        if self.profiler is not None:
+            data["profile"] = self.profile_report().to_dict(orient="records")
+        return data
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), indent=2, ensure_ascii=False)
+
+    def display(self):
+        if self.dataset_bytes is None and not self.records and self.profiler is None:
+            return
+
+        with st.expander("⏱️ Instrumentation"):
+            if self.dataset_bytes is not None:
+                st.metric(
+                    "Empreinte mémoire du dataset",
+                    f"{self.dataset_bytes / 1024**2:.1f} MB",
+                )
+
+            if self.records:
+                st.dataframe(self.to_frame().round(3), use_container_width=True)
+
+            if self.profiler is not None:
+                st.write("**Points chauds (profil de cette exécution) :**")
+                st.dataframe(
+                    self.profile_report().rename(columns=PROFILE_LABELS).round(3),
+                    use_container_width=True,
+                )
+
+            st.download_button(
+                label="📥 Télécharger les mesures (JSON)",
+                data=self.to_json,
+                file_name="instrumentation.json",
+                mime="application/json",
+                on_click="ignore",
+            )
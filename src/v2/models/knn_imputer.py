@@ -0,0 +1,195 @@
+import numpy as np
+from sklearn.metrics.pairwise import nan_euclidean_distances
+from sklearn.neighbors import KDTree
+
+
+class BlockwiseKNNImputer:
+    """Imputation KNN à mémoire bornée, compatible avec KNNImputer (poids uniformes)
+
+    Seules les lignes ayant des valeurs manquantes sont traitées. Les distances
+    (nan-euclidiennes, comme KNNImputer) sont calculées par blocs de
+    block_size x block_size, en conservant au fil des blocs les k meilleurs
+    donneurs de chaque colonne : la mémoire ne dépend pas du nombre de lignes.
+
+    Pour les grands ensembles de donneurs, des index KDTree par motif de valeurs
+    manquantes peuvent remplacer le calcul exact. Un échantillon de lignes est
+    alors comparé au calcul exact et, si l'écart moyen (en écarts-types de la
+    colonne) dépasse tolerance, on revient au calcul exact.
+    """
+
+    def __init__(
+        self,
+        n_neighbors=5,
+        block_size=2048,
+        algorithm="auto",
+        approx_min_donors=50_000,
+        tolerance=0.25,
+        validation_size=200,
+        max_patterns=64,
+        random_state=42,
+    ):
+        self.n_neighbors = n_neighbors
+        self.block_size = block_size
+        self.algorithm = algorithm
+        self.approx_min_donors = approx_min_donors
+        self.tolerance = tolerance
+        self.validation_size = validation_size
+        self.max_patterns = max_patterns
+        self.random_state = random_state
+
+    def fit(self, X):
+        self._fit_X = self._to_array(X)
+        self._mask_fit_X = np.isnan(self._fit_X)
+        self._valid_mask = ~self._mask_fit_X.all(axis=0)
+        self._col_means = np.zeros(self._fit_X.shape[1])
+        self._col_means[self._valid_mask] = np.nanmean(
+            self._fit_X[:, self._valid_mask], axis=0
+        )
+        self._trees = {}
+        self.validation_error_ = None
+        return self
+
+    def fit_transform(self, X):
+        return self.fit(X).transform(X)
+
+    def transform(self, X):
+        X = self._to_array(X).copy()
+        mask = np.isnan(X) & self._valid_mask
+        receivers = np.flatnonzero(mask.any(axis=1))
+
+        if len(receivers) == 0:
+            return X
+
+        if self._use_approximate(mask, receivers):
+            imputed = self._impute_approximate(X, mask, receivers)
+            if not self._within_tolerance(X, mask, receivers, imputed):
+                imputed = self._impute_exact(X, mask, receivers)
+        else:
+            imputed = self._impute_exact(X, mask, receivers)
+
+        rows, cols = np.nonzero(mask[receivers])
+        X[receivers[rows], cols] = imputed[rows, cols]
+        return X
+
+    def _use_approximate(self, mask, receivers):
+        if self.algorithm == "exact":
+            return False
+        # Un index par motif : inutile si presque chaque ligne a son propre motif
+        n_patterns = len(np.unique(mask[receivers], axis=0))
+        if n_patterns > self.max_patterns:
+            return False
+        if self.algorithm == "approximate":
+            return True
+        return len(self._fit_X) >= self.approx_min_donors
+
+    def _impute_exact(self, X, mask, receivers):
+        """k plus proches donneurs exacts, par blocs receveurs x donneurs"""
+        n_cols = X.shape[1]
+        k = self.n_neighbors
+        imputed = np.full((len(receivers), n_cols), np.nan)
+
+        for start in range(0, len(receivers), self.block_size):
+            block_rows = receivers[start : start + self.block_size]
+            block_mask = mask[block_rows]
+            block_cols = np.flatnonzero(block_mask.any(axis=0))
+
+            # Meilleurs donneurs courants par colonne : distances et valeurs
+            best_dist = {c: np.full((len(block_rows), k), np.inf) for c in block_cols}
+            best_vals = {c: np.zeros((len(block_rows), k)) for c in block_cols}
+
+            for d_start in range(0, len(self._fit_X), self.block_size):
+                donors = self._fit_X[d_start : d_start + self.block_size]
+                donors_missing = self._mask_fit_X[d_start : d_start + self.block_size]
+
+                dist = nan_euclidean_distances(X[block_rows], donors)
+                dist[np.isnan(dist)] = np.inf
+
+                for c in block_cols:
+                    dist_c = np.where(donors_missing[:, c], np.inf, dist)
+                    self._merge_top_k(
+                        best_dist[c], best_vals[c], dist_c, donors[:, c], k
+                    )
+
+            for c in block_cols:
+                valid = np.isfinite(best_dist[c])
+                n_valid = valid.sum(axis=1)
+                sums = np.where(valid, best_vals[c], 0).sum(axis=1)
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    values = np.where(n_valid > 0, sums / n_valid, self._col_means[c])
+                imputed[start : start + len(block_rows), c] = values
+
+        return imputed
+
+    @staticmethod
+    def _merge_top_k(best_dist, best_vals, dist, donor_values, k):
+        n_donors = dist.shape[1]
+        if n_donors > k:
+            candidates = np.argpartition(dist, k - 1, axis=1)[:, :k]
+        else:
+            candidates = np.broadcast_to(np.arange(n_donors), (dist.shape[0], n_donors))
+
+        all_dist = np.hstack([best_dist, np.take_along_axis(dist, candidates, axis=1)])
+        all_vals = np.hstack([best_vals, donor_values[candidates]])
+
+        keep = np.argpartition(all_dist, k - 1, axis=1)[:, :k]
+        best_dist[:] = np.take_along_axis(all_dist, keep, axis=1)
+        best_vals[:] = np.take_along_axis(all_vals, keep, axis=1)
+
+    def _impute_approximate(self, X, mask, receivers):
+        """k plus proches donneurs via un KDTree par (motif de manquants, colonne)
+
+        Pour un receveur de colonnes observées O, les donneurs qui observent O
+        et la colonne c ont tous le même poids nan-euclidien : le classement
+        euclidien sur O est alors exactement le classement de KNNImputer. Seuls
+        les donneurs incomplets sur O sont ignorés (c'est l'approximation).
+        """
+        imputed = np.full((len(receivers), X.shape[1]), np.nan)
+
+        patterns, inverse = np.unique(mask[receivers], axis=0, return_inverse=True)
+        for pattern_idx, pattern in enumerate(patterns):
+            rows = np.flatnonzero(inverse.ravel() == pattern_idx)
+            observed = self._valid_mask & ~pattern
+            observed_donors = ~self._mask_fit_X[:, observed].any(axis=1)
+
+            for c in np.flatnonzero(pattern):
+                donors = np.flatnonzero(observed_donors & ~self._mask_fit_X[:, c])
+
+                if not observed.any() or len(donors) < self.n_neighbors:
+                    imputed[rows, c] = self._col_means[c]
+                    continue
+
+                key = (tuple(np.flatnonzero(observed)), c)
+                if key not in self._trees:
+                    self._trees[key] = KDTree(self._fit_X[np.ix_(donors, observed)])
+
+                for start in range(0, len(rows), self.block_size):
+                    block = rows[start : start + self.block_size]
+                    _, neighbors = self._trees[key].query(
+                        X[np.ix_(receivers[block], observed)], k=self.n_neighbors
+                    )
+                    imputed[block, c] = self._fit_X[donors[neighbors], c].mean(axis=1)
+
+        return imputed
+
+    def _within_tolerance(self, X, mask, receivers, imputed):
+        """Compare un échantillon de lignes au calcul exact"""
+        rng = np.random.default_rng(self.random_state)
+        size = min(self.validation_size, len(receivers))
+        sample = rng.choice(len(receivers), size=size, replace=False)
+
+        exact = self._impute_exact(X, mask, receivers[sample])
+        sample_mask = mask[receivers[sample]]
+
+        # Écart moyen en unités d'écart-type de chaque colonne
+        scale = np.nanstd(self._fit_X, axis=0)
+        scale[~np.isfinite(scale) | (scale == 0)] = 1.0
+        errors = np.abs(imputed[sample] - exact) / scale
+        self.validation_error_ = float(errors[sample_mask].mean())
+
+        return self.validation_error_ <= self.tolerance
+
+    @staticmethod
+    def _to_array(X):
+        if hasattr(X, "to_numpy"):
+            return X.to_numpy(dtype=float, na_value=np.nan)
+        return np.asarray(X, dtype=float)
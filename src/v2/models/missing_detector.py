@@ -2,24 +2,39 @@ import numpy as np
 import pandas as pd
 import streamlit as st
 
+from .column_stats import ColumnStats
 from .visualizer import Visualizer
 
+DEFAULT_MISSING_VALUES = [
+    "",
+    "N/A",
+    "?",
+    "Unknown",
+    "null",
+    "NULL",
+    "na",
+    "NA",
+    "-",
+]
+
+
+def _as_numeric(series):
+    """Colonne texte dont toutes les valeurs connues sont des nombres (ex : une
+    colonne numérique contenant une sentinelle) : convertie en nombres"""
+    known = series.notna()
+    values = pd.to_numeric(series, errors="coerce")
+    if known.any() and values[known].notna().all():
+        return values
+    return series
+
 
 class MissingDetector:
     def __init__(self, df):
         self.df = df
-        self.default_missing_values = [
-            "",
-            "N/A",
-            "?",
-            "Unknown",
-            "null",
-            "NULL",
-            "na",
-            "NA",
-            "-",
-        ]
+        self.default_missing_values = list(DEFAULT_MISSING_VALUES)
         self.visualizer = Visualizer()
+        # Statistiques IQR de toutes les colonnes numériques, calculées une fois
+        self.column_stats = ColumnStats(df)
 
     def configure_missing_values(self):  # Détection automatique basique
         auto_detected = self._detect_automatic_missing()
@@ -28,14 +43,15 @@ class MissingDetector:
             st.write("**Valeurs manquantes détectées automatiquement :**")
             for col, values in auto_detected.items():
                 if values:
-                    st.write(f"- **{col}** : {values}")
+                    details = ", ".join(
+                        f"{repr(val) if val == '' else val} ({count})"
+                        for val, count in values.items()
+                    )
+                    st.write(f"- **{col}** : {details}")
 
         # Configuration manuelle des valeurs personnalisées
         st.write("**Ajout de valeurs personnalisées manquantes :**")
 
-        config = {}
-        columns = list(self.df.columns)
-
         # Interface simplifiée pour l'ajout de valeurs manquantes
         custom_missing = st.text_input(
             "Valeurs supplémentaires à considérer comme manquantes (séparées par des virgules)",
@@ -48,10 +64,7 @@ class MissingDetector:
             custom_values = [v.strip() for v in custom_missing.split(",")]
 
         # Appliquer à toutes les colonnes
-        for col in columns:
-            config[col] = {
-                "missing_values": self.default_missing_values + custom_values
-            }
+        config = self.build_config(custom_values)
 
         # Gestion des outliers avec boxplots en colonnes
         st.subheader("Gestion des valeurs aberrantes (Outliers)")
@@ -67,6 +80,46 @@ class MissingDetector:
 
         return config
 
+    def build_config(self, custom_values=None, handle_outliers=False):
+        """Construit la configuration de détection sans interface"""
+        config = self.missing_values_config(self.df.columns, custom_values)
+
+        if handle_outliers:
+            for col, col_config in self._outlier_config().items():
+                config[col].update(col_config)
+
+        return config
+
+    @staticmethod
+    def missing_values_config(columns, custom_values=None):
+        """Valeurs par défaut et personnalisées, considérées manquantes partout"""
+        missing_values = DEFAULT_MISSING_VALUES + list(custom_values or [])
+        return {col: {"missing_values": missing_values} for col in columns}
+
+    def _outlier_config(self):
+        return self.outlier_config(self.column_stats)
+
+    @staticmethod
+    def outlier_config(column_stats):
+        """Configuration des outliers à partir de statistiques IQR (ColumnStats,
+        ou SketchColumnStats pour des données lues par blocs)"""
+        outlier_config = {}
+
+        for col in column_stats.columns:
+            outliers_info = column_stats.get(col)
+            if outliers_info["outliers_count"] > 0:
+                outlier_config[col] = {
+                    "handle_outliers": "Traiter comme valeurs manquantes",
+                    "outlier_bounds": (
+                        outliers_info["lower_bound"],
+                        outliers_info["upper_bound"],
+                    ),
+                }
+            else:
+                outlier_config[col] = {"handle_outliers": "Conserver"}
+
+        return outlier_config
+
     def _configure_outliers(self):
         numeric_cols = self.df.select_dtypes(include=[np.number]).columns
         outlier_config = {}
@@ -90,10 +143,9 @@ class MissingDetector:
                     col_name = numeric_cols[global_idx]
                     with cols[col_idx]:
                         st.write(f"**{col_name}**")
-                        self.visualizer.plot_boxplot(self.df[col_name])
-
                         # Calcul des outliers avec IQR
-                        outliers_info = self._detect_outliers_iqr(self.df[col_name])
+                        outliers_info = self._detect_outliers_iqr(col_name)
+                        self.visualizer.plot_boxplot(self.df[col_name], outliers_info)
 
                         if outliers_info["outliers_count"] > 0:
                             st.write(f"Outliers: {outliers_info['outliers_count']}")
@@ -108,72 +160,93 @@ class MissingDetector:
             )
 
             if handle_all_outliers:
-                for col in numeric_cols:
-                    outliers_info = self._detect_outliers_iqr(self.df[col])
-                    if outliers_info["outliers_count"] > 0:
-                        outlier_config[col] = {
-                            "handle_outliers": "Traiter comme valeurs manquantes",
-                            "outlier_bounds": (
-                                outliers_info["lower_bound"],
-                                outliers_info["upper_bound"],
-                            ),
-                        }
-                    else:
-                        outlier_config[col] = {"handle_outliers": "Conserver"}
+                outlier_config = self._outlier_config()
 
         return outlier_config
 
-    def _detect_outliers_iqr(self, series):
-        clean_series = series.dropna()
-
-        if len(clean_series) == 0:
-            return {"outliers_count": 0, "lower_bound": 0, "upper_bound": 0}
-
-        Q1 = clean_series.quantile(0.25)
-        Q3 = clean_series.quantile(0.75)
-        IQR = Q3 - Q1
-
-        lower_bound = Q1 - 1.5 * IQR
-        upper_bound = Q3 + 1.5 * IQR
-
-        outliers = clean_series[
-            (clean_series < lower_bound) | (clean_series > upper_bound)
-        ]
-
-        return {
-            "outliers_count": len(outliers),
-            "lower_bound": lower_bound,
-            "upper_bound": upper_bound,
-            "outliers": outliers,
-        }
+    def _detect_outliers_iqr(self, col, column_stats=None):
+        column_stats = column_stats if column_stats is not None else self.column_stats
+        return column_stats.get(col)
 
     def _detect_automatic_missing(self):
-        detected = {}
+        """Compte, par colonne, les NaN et chaque valeur manquante par défaut"""
+        counts = {}
+
+        # Valeurs NaN
+        nan_counts = self.df.isnull().sum()
+        for col, count in nan_counts[nan_counts > 0].items():
+            counts[col] = {"NaN": int(count)}
+
+        # Valeurs par défaut : un seul isin sur toutes les colonnes texte,
+        # puis comptage (colonne, valeur) par bincount sur les cellules trouvées
+        sentinels = pd.unique(pd.Series(self.default_missing_values, dtype=object))
+        text_df = self.df.select_dtypes(include=["object", "category"])
+        if text_df.shape[1] > 0:
+            mask = text_df.isin(sentinels).to_numpy()
+            rows, cols = np.nonzero(mask)
+
+            if len(rows) > 0:
+                values = text_df.to_numpy()[rows, cols]
+                codes = pd.Categorical(values, categories=sentinels).codes
+                grid = np.bincount(
+                    cols * len(sentinels) + codes,
+                    minlength=text_df.shape[1] * len(sentinels),
+                ).reshape(text_df.shape[1], len(sentinels))
+
+                for col_idx, val_idx in zip(*np.nonzero(grid)):
+                    col = text_df.columns[col_idx]
+                    val = sentinels[val_idx]
+                    counts.setdefault(col, {})[val] = int(grid[col_idx, val_idx])
+
+        # Conserver l'ordre des colonnes du DataFrame
+        return {col: counts[col] for col in self.df.columns if col in counts}
+
+    def apply_missing_detection(self, config):
+        self.config = config
+        df_processed = self.process(config)
 
-        for col in self.df.columns:
-            col_missing = []
+        # Afficher le résumé
+        st.subheader("Résumé après traitement")
+        missing_summary = df_processed.isnull().sum()
+        missing_summary = missing_summary[missing_summary > 0].sort_values(
+            ascending=False
+        )
 
-            # Valeurs NaN
-            if self.df[col].isnull().any():
-                col_missing.append("NaN")
+        if len(missing_summary) > 0:
+            summary_df = pd.DataFrame(
+                {
+                    "Colonne": missing_summary.index,
+                    "Valeurs manquantes": missing_summary.values,
+                    "Pourcentage": (
+                        missing_summary.values / len(df_processed) * 100
+                    ).round(2),
+                }
+            )
+            st.dataframe(summary_df)
+        else:
+            st.success("Aucune valeur manquante après traitement")
 
-            # Valeurs par défaut
-            for val in self.default_missing_values:
-                if val in self.df[col].values:
-                    col_missing.append(val)
+        # Réafficher les boxplots après traitement
+        self._show_post_treatment_boxplots(df_processed)
 
-            if col_missing:
-                detected[col] = col_missing
+        return df_processed
 
-        return detected
+    def process(self, config):
+        """Applique la configuration (valeurs manquantes, outliers) sans affichage"""
+        return self.apply_config(self.df, config)
 
-    def apply_missing_detection(self, config):
-        df_processed = self.df.copy()
+    @staticmethod
+    def apply_config(df, config):
+        """Applique la configuration à un DataFrame quelconque (ex : un bloc lu
+        en streaming)"""
+        df_processed = df.copy()
 
         for col, col_config in config.items():
             # Remplacer les valeurs manquantes par NaN
             missing_values = col_config["missing_values"]
             df_processed[col] = df_processed[col].replace(missing_values, np.nan)
+            if pd.api.types.is_object_dtype(df_processed[col]):
+                df_processed[col] = _as_numeric(df_processed[col])
 
             # Traitement des outliers
             if (
@@ -193,35 +266,17 @@ class MissingDetector:
                         )
                         df_processed.loc[mask, col] = np.nan
 
-        # Afficher le résumé
-        st.subheader("Résumé après traitement")
-        missing_summary = df_processed.isnull().sum()
-        missing_summary = missing_summary[missing_summary > 0].sort_values(
-            ascending=False
-        )
-
-        if len(missing_summary) > 0:
-            summary_df = pd.DataFrame(
-                {
-                    "Colonne": missing_summary.index,
-                    "Valeurs manquantes": missing_summary.values,
-                    "Pourcentage": (
-                        missing_summary.values / len(df_processed) * 100
-                    ).round(2),
-                }
-            )
-            st.dataframe(summary_df)
-        else:
-            st.success("Aucune valeur manquante après traitement")
-
-        # Réafficher les boxplots après traitement
-        self._show_post_treatment_boxplots(df_processed)
-
         return df_processed
 
     def _show_post_treatment_boxplots(self, df_processed):
         """Affiche les boxplots après traitement pour montrer l'effet"""
-        numeric_cols = df_processed.select_dtypes(include=[np.number]).columns
+        # Colonnes numériques avant traitement (une colonne convertie en nombres
+        # après retrait des sentinelles n'a pas de statistiques "avant")
+        numeric_cols = [
+            col
+            for col in df_processed.select_dtypes(include=[np.number]).columns
+            if col in self.column_stats.columns
+        ]
 
         if len(numeric_cols) == 0:
             return
@@ -236,6 +291,8 @@ class MissingDetector:
             st.subheader("📊 Visualisation après traitement des outliers")
             st.write("**Comparaison avant/après traitement :**")
 
+            processed_stats = ColumnStats(df_processed)
+
             # Calculer le nombre de colonnes optimal (max 3 par ligne)
             cols_per_row = min(3, len(numeric_cols))
             num_rows = (len(numeric_cols) + cols_per_row - 1) // cols_per_row
@@ -249,15 +306,15 @@ class MissingDetector:
                         with cols[col_idx]:
                             st.write(f"**{col_name}**")
 
-                            # Boxplot après traitement
-                            self.visualizer.plot_boxplot(df_processed[col_name])
-
                             # Comparaison des statistiques
-                            original_outliers = self._detect_outliers_iqr(
-                                self.df[col_name]
-                            )
+                            original_outliers = self._detect_outliers_iqr(col_name)
                             processed_outliers = self._detect_outliers_iqr(
-                                df_processed[col_name]
+                                col_name, processed_stats
+                            )
+
+                            # Boxplot après traitement
+                            self.visualizer.plot_boxplot(
+                                df_processed[col_name], processed_outliers
                             )
 
                             if original_outliers["outliers_count"] > 0:
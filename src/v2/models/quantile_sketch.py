@@ -0,0 +1,102 @@
+import numpy as np
+
+# Taille des compacteurs : erreur de rang de l'ordre de 1 % pour k = 200
+DEFAULT_SKETCH_SIZE = 200
+
+
+class QuantileSketch:
+    """Esquisse de quantiles fusionnable (type KLL), à mémoire bornée
+
+    Les valeurs sont empilées par niveaux ; un niveau plein est trié et une
+    valeur sur deux (décalage aléatoire) monte au niveau suivant, où elle
+    compte double. La mémoire est en O(k) quel que soit le nombre de valeurs
+    et l'erreur de rang est en O(1/k). Deux esquisses construites sur des blocs
+    ou des processus différents se fusionnent avec merge.
+    """
+
+    def __init__(self, k=DEFAULT_SKETCH_SIZE, seed=42):
+        self.k = k
+        self.count = 0
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values):
+        """Ajoute un lot de valeurs (les NaN sont ignorés)"""
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+
+        self.count += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        """Fusionne une autre esquisse (niveau par niveau)"""
+        for level, items in enumerate(other.levels):
+            if level == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[level] = np.concatenate([self.levels[level], items])
+
+        self.count += other.count
+        self._compress()
+        return self
+
+    def _capacity(self, level):
+        # Les niveaux bas (poids faibles) ont une capacité réduite
+        depth = len(self.levels) - level - 1
+        return max(int(np.ceil(self.k * (2 / 3) ** depth)), 2)
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            if len(self.levels[level]) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+
+                items = np.sort(self.levels[level])
+                # Nombre impair : la dernière valeur reste à ce niveau
+                n_pairs = len(items) - len(items) % 2
+                offset = self._rng.integers(2)
+                self.levels[level] = items[n_pairs:]
+                self.levels[level + 1] = np.concatenate(
+                    [self.levels[level + 1], items[offset:n_pairs:2]]
+                )
+            level += 1
+
+    def quantile(self, q):
+        """Quantile(s) approché(s) ; NaN si l'esquisse est vide"""
+        if self.count == 0:
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else np.nan
+
+        items, cumulative = self._sorted()
+        ranks = np.asarray(q, dtype=float) * cumulative[-1]
+        positions = np.searchsorted(cumulative, ranks, side="left")
+        return items[np.minimum(positions, len(items) - 1)]
+
+    def rank(self, x, inclusive=False):
+        """Fraction approchée des valeurs < x (<= x si inclusive)"""
+        if self.count == 0:
+            return np.full(np.shape(x), np.nan) if np.ndim(x) else np.nan
+
+        items, cumulative = self._sorted()
+        positions = np.searchsorted(items, x, side="right" if inclusive else "left")
+        below = np.where(positions > 0, cumulative[positions - 1], 0)
+        return below / cumulative[-1]
+
+    def _sorted(self):
+        """Valeurs triées et poids cumulés"""
+        items = np.concatenate(self.levels)
+        weights = np.concatenate(
+            [
+                np.full(len(level_items), 2**level)
+                for level, level_items in enumerate(self.levels)
+            ]
+        )
+        order = np.argsort(items, kind="stable")
+        return items[order], np.cumsum(weights[order])
+
+    @property
+    def nbytes(self):
+        return sum(items.nbytes for items in self.levels)
@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+
+from .quantile_sketch import DEFAULT_SKETCH_SIZE, QuantileSketch
+
+
+def _numeric_values(series):
+    # Texte isolé dans une colonne numérique d'un autre bloc : traité comme manquant
+    return pd.to_numeric(series, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+
+
+class StreamingSimpleImputer:
+    """Imputation simple (moyenne, médiane, mode) de fichiers plus grands que
+    la mémoire, en deux passes par blocs
+
+    Première passe (partial_fit) : somme et effectif exacts pour la moyenne,
+    esquisse de quantiles pour la médiane (approchée), comptage des valeurs
+    pour le mode et les colonnes catégorielles. Deuxième passe (transform) :
+    chaque bloc est rempli indépendamment. La mémoire dépend de la taille des
+    blocs (et, pour le mode, du nombre de valeurs distinctes), pas de celle du
+    fichier.
+    """
+
+    def __init__(self, strategy="mean", sketch_size=DEFAULT_SKETCH_SIZE):
+        self.strategy = strategy
+        self.sketch_size = sketch_size
+        self.columns = []
+        self.numeric_cols = []
+        self.categorical_cols = []
+        self.n_rows = 0
+        self.sums = {}
+        self.counts = {}
+        self.sketches = {}
+        self.value_counts = {}
+        self._fill_values = None
+
+    def fit(self, chunks):
+        for chunk in chunks:
+            self.partial_fit(chunk)
+        return self
+
+    def partial_fit(self, chunk):
+        self._set_columns(chunk)
+        self.n_rows += len(chunk)
+        self._fill_values = None
+
+        for col in self.numeric_cols:
+            values = _numeric_values(chunk[col])
+            values = values[~np.isnan(values)]
+
+            if self.strategy == "mean":
+                self.sums[col] = self.sums.get(col, 0.0) + values.sum()
+                self.counts[col] = self.counts.get(col, 0) + len(values)
+            elif self.strategy == "median":
+                self.sketches.setdefault(col, QuantileSketch(self.sketch_size)).update(
+                    values
+                )
+            else:
+                self._count_values(col, values)
+
+        for col in self.categorical_cols:
+            self._count_values(col, chunk[col].dropna().to_numpy())
+
+        return self
+
+    def _set_columns(self, chunk):
+        """Type de chaque colonne, fixé par le premier bloc où elle a des valeurs
+        (les colonnes numériques lues comme texte à cause d'une sentinelle sont
+        converties en amont, par MissingDetector.apply_config)"""
+        if not self.columns:
+            self.columns = list(chunk.columns)
+
+        for col in self.columns:
+            if col in self.numeric_cols or col in self.categorical_cols:
+                continue
+            if chunk[col].notna().any():
+                if pd.api.types.is_numeric_dtype(chunk[col]):
+                    self.numeric_cols.append(col)
+                else:
+                    self.categorical_cols.append(col)
+
+    def _count_values(self, col, values):
+        counts = pd.Series(values).value_counts()
+        if col in self.value_counts:
+            counts = self.value_counts[col].add(counts, fill_value=0)
+        self.value_counts[col] = counts
+
+    @property
+    def fill_values(self):
+        """Valeur de remplacement de chaque colonne (calculée après la 1re passe)"""
+        if self._fill_values is None:
+            self._fill_values = {}
+
+            for col in self.numeric_cols:
+                if self.strategy == "mean":
+                    fill_value = (
+                        self.sums[col] / self.counts[col]
+                        if self.counts[col]
+                        else np.nan
+                    )
+                elif self.strategy == "median":
+                    fill_value = self.sketches[col].quantile(0.5)
+                else:
+                    counts = self.value_counts[col]
+                    # Égalités : plus petite valeur, comme SimpleImputer
+                    fill_value = (
+                        counts[counts == counts.max()].index.min()
+                        if len(counts) > 0
+                        else np.nan
+                    )
+                self._fill_values[col] = float(fill_value)
+
+            for col in self.categorical_cols:
+                counts = self.value_counts[col]
+                self._fill_values[col] = (
+                    counts.idxmax() if len(counts) > 0 else "Unknown"
+                )
+
+        return self._fill_values
+
+    def transform(self, chunk):
+        """Remplit un bloc ; colonnes numériques en flottants, catégorielles en
+        texte, pour un schéma identique d'un bloc à l'autre"""
+        chunk = chunk.copy()
+
+        for col in self.numeric_cols:
+            values = _numeric_values(chunk[col])
+            chunk[col] = np.where(np.isnan(values), self.fill_values[col], values)
+
+        for col in self.categorical_cols:
+            values = chunk[col].to_numpy(dtype=object)
+            values[pd.isna(values)] = self.fill_values[col]
+            # Valeurs lues comme nombres dans certains blocs : texte partout
+            chunk[col] = values.astype(str).astype(object)
+
+        return chunk
@@ -1,9 +1,30 @@
+import io
+
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 import seaborn as sns
 import streamlit as st
 
+from .cache import LRUCache, hash_bytes, hash_dataframe
+
+# Taille maximale du cache des images de graphiques (en Mo)
+FIGURE_CACHE_MAX_MB = 256
+# Nombre maximal d'histogrammes précalculés conservés
+HISTOGRAM_CACHE_SIZE = 512
+
+
+@st.cache_resource
+def get_figure_cache():
+    """Images PNG des graphiques, par contenu des données et paramètres"""
+    return LRUCache(FIGURE_CACHE_MAX_MB * 1024**2, sizeof=len)
+
+
+@st.cache_resource
+def get_histogram_cache():
+    """Comptes et bornes des histogrammes, par contenu des données et nombre de bins"""
+    return LRUCache(HISTOGRAM_CACHE_SIZE)
+
 
 class Visualizer:
     def __init__(self):
@@ -11,12 +32,19 @@ class Visualizer:
         sns.set_palette("husl")
 
     def plot_distribution(self, series, bins=30):
-        fig, ax = plt.subplots(figsize=(8, 4))
-
         # Nettoyer les données
-        clean_series = series.dropna()
+        values = series.dropna().to_numpy(dtype=float)
+        content = hash_bytes(np.ascontiguousarray(values))
 
-        if len(clean_series) == 0:
+        self._render(
+            ("distribution", content, series.name, bins),
+            lambda: self._draw_distribution(values, content, series.name, bins),
+        )
+
+    def _draw_distribution(self, values, content, name, bins):
+        fig, ax = plt.subplots(figsize=(8, 4))
+
+        if len(values) == 0:
             ax.text(
                 0.5,
                 0.5,
@@ -26,15 +54,14 @@ class Visualizer:
                 transform=ax.transAxes,
             )
         else:
-            # Histogramme
-            ax.hist(clean_series, bins=bins, alpha=0.7, edgecolor="black")
+            # Histogramme (comptes calculés une fois par contenu et nombre de bins)
+            counts, edges, mean_val, median_val = self._histogram(values, content, bins)
+            self._draw_histogram(ax, counts, edges, edgecolor="black")
             ax.set_ylabel("Fréquence")
             ax.set_xlabel("Valeur")
-            ax.set_title(f"Distribution - {series.name}")
+            ax.set_title(f"Distribution - {name}")
 
             # Statistiques
-            mean_val = clean_series.mean()
-            median_val = clean_series.median()
             ax.axvline(
                 mean_val, color="red", linestyle="--", label=f"Moyenne: {mean_val:.2f}"
             )
@@ -46,16 +73,34 @@ class Visualizer:
             )
             ax.legend()
 
-        plt.tight_layout()
-        st.pyplot(fig)
-        plt.close()
+        return fig
 
-    def plot_categorical_distribution(self, series, max_categories=10):
-        fig, ax = plt.subplots(figsize=(8, 4))
+    @staticmethod
+    def _draw_histogram(ax, counts, edges, **kwargs):
+        ax.bar(
+            edges[:-1], counts, width=np.diff(edges), align="edge", alpha=0.7, **kwargs
+        )
+
+    @staticmethod
+    def _histogram(values, content, bins):
+        def compute():
+            counts, edges = np.histogram(values, bins=bins)
+            return counts, edges, values.mean(), np.median(values)
+
+        return get_histogram_cache().get_or_compute((content, bins), compute)
 
+    def plot_categorical_distribution(self, series, max_categories=10):
         # Nettoyer les données
         clean_series = series.dropna()
 
+        self._render(
+            ("categorical", hash_dataframe(clean_series.to_frame()), max_categories),
+            lambda: self._draw_categorical_distribution(clean_series, max_categories),
+        )
+
+    def _draw_categorical_distribution(self, clean_series, max_categories):
+        fig, ax = plt.subplots(figsize=(8, 4))
+
         if len(clean_series) == 0:
             ax.text(
                 0.5,
@@ -74,7 +119,7 @@ class Visualizer:
             ax.set_xticks(range(len(value_counts)))
             ax.set_xticklabels(value_counts.index, rotation=45, ha="right")
             ax.set_ylabel("Fréquence")
-            ax.set_title(f"Distribution - {series.name}")
+            ax.set_title(f"Distribution - {clean_series.name}")
 
             # Ajouter les valeurs sur les barres
             for bar, value in zip(bars, value_counts.values):
@@ -86,21 +131,52 @@ class Visualizer:
                     va="bottom",
                 )
 
-        plt.tight_layout()
-        st.pyplot(fig)
-        plt.close()
+        return fig
 
-    def plot_missing_heatmap(self, df):
-        fig, ax = plt.subplots(figsize=(10, 6))
+    def _render(self, key, draw):
+        """Affiche l'image PNG du graphique, dessiné seulement s'il n'est pas en cache"""
+        png = get_figure_cache().get_or_compute(key, lambda: self._to_png(draw()))
+        st.image(png)
 
-        # Matrice des valeurs manquantes
-        missing_matrix = df.isnull()
+    @staticmethod
+    def _to_png(fig):
+        fig.tight_layout()
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png")
+        plt.close(fig)
+        return buffer.getvalue()
 
-        if missing_matrix.any().any():
-            # Heatmap
-            sns.heatmap(
-                missing_matrix, cbar=True, cmap="viridis", yticklabels=False, ax=ax
+    def plot_missing_heatmap(self, df, max_bins=200, key=None):
+        # key : identifiant du dataset s'il est connu, évite de hacher son contenu
+        content = key if key is not None else hash_dataframe(df)
+
+        self._render(
+            ("missing_heatmap", content, max_bins),
+            lambda: self._draw_missing_heatmap(df, max_bins),
+        )
+
+    def _draw_missing_heatmap(self, df, max_bins):
+        fig, ax = plt.subplots(figsize=(10, 6))
+
+        # Fraction de valeurs manquantes par paquet de lignes et par colonne :
+        # la taille de l'image ne dépend pas du nombre de lignes
+        missing_fraction, rows_per_bin = self._missing_fraction_by_bins(df, max_bins)
+
+        if missing_fraction.any():
+            image = ax.imshow(
+                missing_fraction,
+                aspect="auto",
+                interpolation="nearest",
+                cmap="viridis",
+                vmin=0,
+                vmax=1,
             )
+            fig.colorbar(image, ax=ax, label="Fraction manquante")
+            ax.set_xticks(range(len(df.columns)))
+            ax.set_xticklabels(df.columns, rotation=90)
+            ax.set_yticks([])
+            if rows_per_bin > 1:
+                ax.set_ylabel(f"Lignes (par paquets de ~{rows_per_bin})")
             ax.set_title("Heatmap des valeurs manquantes")
             ax.set_xlabel("Colonnes")
         else:
@@ -114,9 +190,26 @@ class Visualizer:
             )
             ax.set_title("Heatmap des valeurs manquantes")
 
-        plt.tight_layout()
-        st.pyplot(fig)
-        plt.close()
+        return fig
+
+    @staticmethod
+    def _missing_fraction_by_bins(df, max_bins):
+        n_rows = len(df)
+        n_bins = max(min(n_rows, max_bins), 1)
+        starts = np.linspace(0, n_rows, n_bins + 1).astype(int)[:-1]
+        sizes = np.diff(np.append(starts, n_rows))
+
+        missing_fraction = np.zeros((n_bins, len(df.columns)))
+        if n_rows == 0:
+            return missing_fraction, 0
+
+        # Colonne par colonne : pas de matrice booléenne complète en mémoire
+        for j, col in enumerate(df.columns):
+            missing = df[col].isnull().to_numpy()
+            counts = np.add.reduceat(missing, starts, dtype=np.int64)
+            missing_fraction[:, j] = counts / sizes
+
+        return missing_fraction, int(np.ceil(n_rows / n_bins))
 
     def plot_correlation_matrix(self, df):
         numeric_df = df.select_dtypes(include=[np.number])
@@ -139,10 +232,21 @@ class Visualizer:
         else:
             st.info("Pas assez de colonnes numériques pour la corrélation")
 
-    def plot_boxplot(self, series):
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(10, 3))
-
+    def plot_boxplot(self, series, outliers_info=None):
         clean_series = series.dropna()
+        content = hash_dataframe(clean_series.to_frame())
+
+        bounds = None
+        if outliers_info is not None:
+            bounds = (outliers_info["lower_bound"], outliers_info["upper_bound"])
+
+        self._render(
+            ("boxplot", content, bounds),
+            lambda: self._draw_boxplot(series, clean_series, outliers_info),
+        )
+
+    def _draw_boxplot(self, series, clean_series, outliers_info):
+        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(10, 3))
 
         if len(clean_series) > 0:
             # Boxplot
@@ -152,26 +256,37 @@ class Visualizer:
             ax1.set_xticklabels([series.name])
 
             # Histogramme avec outliers mis en évidence
-            Q1 = clean_series.quantile(0.25)
-            Q3 = clean_series.quantile(0.75)
-            IQR = Q3 - Q1
-            lower_bound = Q1 - 1.5 * IQR
-            upper_bound = Q3 + 1.5 * IQR
+            if outliers_info is not None:
+                # Statistiques déjà calculées (ColumnStats)
+                Q1 = outliers_info["q1"]
+                Q3 = outliers_info["q3"]
+                IQR = outliers_info["iqr"]
+                lower_bound = outliers_info["lower_bound"]
+                upper_bound = outliers_info["upper_bound"]
+                is_outlier = outliers_info["mask"].loc[clean_series.index]
+            else:
+                Q1 = clean_series.quantile(0.25)
+                Q3 = clean_series.quantile(0.75)
+                IQR = Q3 - Q1
+                lower_bound = Q1 - 1.5 * IQR
+                upper_bound = Q3 + 1.5 * IQR
+                is_outlier = (clean_series < lower_bound) | (clean_series > upper_bound)
 
             # Séparer les outliers des données normales
-            normal_data = clean_series[
-                (clean_series >= lower_bound) & (clean_series <= upper_bound)
-            ]
-            outliers = clean_series[
-                (clean_series < lower_bound) | (clean_series > upper_bound)
-            ]
+            normal_data = clean_series[~is_outlier]
+            outliers = clean_series[is_outlier]
 
             # Histogramme
-            ax2.hist(
-                normal_data, bins=20, alpha=0.7, color="blue", label="Données normales"
+            self._draw_histogram(
+                ax2,
+                *np.histogram(normal_data, bins=20),
+                color="blue",
+                label="Données normales",
             )
             if len(outliers) > 0:
-                ax2.hist(outliers, bins=5, alpha=0.7, color="red", label="Outliers")
+                self._draw_histogram(
+                    ax2, *np.histogram(outliers, bins=5), color="red", label="Outliers"
+                )
 
             ax2.axvline(
                 lower_bound,
@@ -212,6 +327,4 @@ class Visualizer:
                 transform=ax2.transAxes,
             )
 
-        plt.tight_layout()
-        st.pyplot(fig)
-        plt.close()
+        return fig
@@ -0,0 +1,323 @@
+"""Pipeline d'imputation sans interface Streamlit (exécution en lot)
+
+Usage :
+    python pipeline.py config.json
+
+Exemple de configuration :
+    {
+        "input_dir": "data/",
+        "pattern": "*.csv",
+        "output_dir": "output/",
+        "target_column": null,
+        "custom_missing_values": ["-999"],
+        "handle_outliers": true,
+        "methods": {
+            "Simple - Median": {"group_by": ["Category"]},
+            "KNN": {"n_neighbors": 7}
+        },
+        "n_jobs": 4,
+        "compact": false,
+        "holdout": {"fraction": 0.1, "repeats": 3},
+        "track_memory": true,
+        "profile": false,
+        "export_format": "parquet",
+        "streaming": false,
+        "chunk_size": 200000
+    }
+
+En mode "streaming", seules les méthodes simples sont disponibles : chaque
+fichier est lu deux fois par blocs (statistiques, puis remplissage et écriture
+de chaque bloc), sans jamais être chargé en entier. Avec "handle_outliers", une
+passe supplémentaire calcule des bornes IQR approchées (esquisses de quantiles).
+"""
+
+import argparse
+import json
+import sys
+from contextlib import ExitStack
+from pathlib import Path
+
+from models.column_stats import SketchColumnStats
+from models.comparison_engine import ComparisonEngine
+from models.exporter import ChunkWriter, export_file_name, write_result
+from models.imputation_engine import IMPUTATION_METHODS, ImputationEngine
+from models.instrumentation import Instrumentation
+from models.missing_detector import MissingDetector
+from models.streaming_imputer import StreamingSimpleImputer
+from utils import CHUNK_SIZE, read_chunks, read_data
+
+DEFAULT_CONFIG = {
+    "input_dir": ".",
+    "pattern": "*.csv",
+    "output_dir": "output",
+    "target_column": None,
+    "custom_missing_values": [],
+    "handle_outliers": False,
+    "methods": {"Simple - Mean": {}},
+    "n_jobs": 1,
+    "compact": False,
+    # Évaluation par masquage de valeurs connues (None : désactivée)
+    "holdout": None,
+    # Pic mémoire par étape et par méthode (tracemalloc, ralentit les calculs)
+    "track_memory": False,
+    # Profil cProfile (points chauds) de chaque fichier
+    "profile": False,
+    # Format des fichiers imputés : csv, csv.gz, parquet ou feather
+    "export_format": "csv",
+    # Imputation simple en deux passes par blocs, pour les fichiers plus grands
+    # que la mémoire
+    "streaming": False,
+    "chunk_size": CHUNK_SIZE,
+}
+
+
+def load_config(path):
+    with open(path, encoding="utf-8") as f:
+        return {**DEFAULT_CONFIG, **json.load(f)}
+
+
+def build_methods(methods_config):
+    """Complète la configuration de chaque méthode avec ses paramètres par défaut"""
+    unknown = [name for name in methods_config if name not in IMPUTATION_METHODS]
+    if unknown:
+        raise ValueError(f"Méthodes inconnues : {unknown}")
+
+    return {
+        name: {**IMPUTATION_METHODS[name], **(params or {})}
+        for name, params in methods_config.items()
+    }
+
+
+def run_file(path, config, methods):
+    """Exécute le pipeline complet sur un fichier et renvoie ses métriques"""
+    instrumentation = Instrumentation(
+        track_memory=config["track_memory"], profile=config["profile"]
+    )
+    run = _run_file_streaming if config["streaming"] else _run_file
+    instrumentation.start_profiling()
+    try:
+        metrics = run(path, config, methods, instrumentation)
+    finally:
+        instrumentation.stop_profiling()
+
+    metrics["instrumentation"] = instrumentation.to_dict()
+    return metrics
+
+
+def _run_file(path, config, methods, instrumentation):
+
+    with instrumentation.stage("Chargement"), open(path, "rb") as f:
+        df = read_data(f, compact=config["compact"])
+    instrumentation.dataset_bytes = int(df.memory_usage(deep=True).sum())
+
+    target_col = config["target_column"]
+    df_features = df.drop(columns=[target_col]) if target_col in df else df
+
+    # Détection des valeurs manquantes et des outliers
+    with instrumentation.stage("Détection"):
+        detector = MissingDetector(df_features)
+        missing_config = detector.build_config(
+            config["custom_missing_values"], handle_outliers=config["handle_outliers"]
+        )
+        df_processed = detector.process(missing_config)
+
+    metrics = {
+        "file": str(path),
+        "rows": int(df.shape[0]),
+        "columns": int(df.shape[1]),
+        "sentinels": detector._detect_automatic_missing(),
+        "missing_after_detection": int(df_processed.isnull().sum().sum()),
+        "errors": {},
+        "global_metrics": [],
+        "column_metrics": {},
+        "outputs": {},
+    }
+
+    if metrics["missing_after_detection"] == 0:
+        return metrics
+
+    # Imputation
+    imputer = ImputationEngine(
+        df_processed, n_jobs=config["n_jobs"], instrumentation=instrumentation
+    )
+    results = {}
+    with instrumentation.stage("Imputation"):
+        for method_name, outcome in imputer.iter_imputations(methods):
+            if isinstance(outcome, Exception):
+                metrics["errors"][method_name] = str(outcome)
+            else:
+                results[method_name] = outcome
+
+    # Comparaison
+    with instrumentation.stage("Comparaison"):
+        comparator = ComparisonEngine(
+            df_processed, results, methods, n_jobs=config["n_jobs"]
+        )
+        metrics["global_metrics"] = _records(comparator.compute_global_metrics())
+        for col in comparator.missing_columns():
+            metrics["column_metrics"][col] = _records(
+                comparator.compute_column_metrics(col)
+            )
+
+    holdout = config["holdout"]
+    if holdout:
+        metrics["holdout_metrics"] = _records(
+            comparator.compute_holdout_metrics(
+                holdout.get("fraction", 0.1),
+                holdout.get("repeats", 3),
+            )
+        )
+
+    # Export
+    output_dir = Path(config["output_dir"])
+    output_dir.mkdir(parents=True, exist_ok=True)
+    with instrumentation.stage("Export"):
+        for method_name, result in results.items():
+            output_path = output_dir / export_file_name(
+                method_name,
+                config["export_format"],
+                prefix=f"{Path(path).stem}_imputed",
+            )
+            # Écriture par blocs, sans reconstruire le DataFrame complet
+            with open(output_path, "wb") as f:
+                write_result(result, config["export_format"], f)
+            metrics["outputs"][method_name] = str(output_path)
+
+    return metrics
+
+
+def _run_file_streaming(path, config, methods, instrumentation):
+    """Imputation simple en deux passes par blocs : la mémoire dépend de la
+    taille des blocs, pas de celle du fichier"""
+    target_col = config["target_column"]
+    outlier_config = {}
+
+    def chunks():
+        for chunk in read_chunks(path, config["chunk_size"]):
+            if target_col in chunk:
+                chunk = chunk.drop(columns=[target_col])
+            missing_config = MissingDetector.missing_values_config(
+                chunk.columns, config["custom_missing_values"]
+            )
+            for col, col_config in outlier_config.items():
+                if col in missing_config:
+                    missing_config[col] = {**missing_config[col], **col_config}
+            yield MissingDetector.apply_config(chunk, missing_config)
+
+    metrics = {
+        "file": str(path),
+        "streaming": True,
+        "rows": 0,
+        "columns": 0,
+        "missing_after_detection": 0,
+        "errors": {},
+        "outlier_bounds": {},
+        "fill_values": {},
+        "outputs": {},
+    }
+
+    imputers = {}
+    for method_name, method_config in methods.items():
+        if method_config["type"] == "simple":
+            imputers[method_name] = StreamingSimpleImputer(method_config["strategy"])
+        else:
+            metrics["errors"][method_name] = "Méthode indisponible en streaming"
+
+    # Bornes IQR approchées (esquisses de quantiles), en une passe
+    if config["handle_outliers"]:
+        with instrumentation.stage("Détection des outliers"):
+            column_stats = SketchColumnStats()
+            for chunk in chunks():
+                column_stats.partial_fit(chunk)
+            outlier_config.update(MissingDetector.outlier_config(column_stats))
+
+        metrics["outlier_bounds"] = {
+            col: col_config["outlier_bounds"]
+            for col, col_config in outlier_config.items()
+            if "outlier_bounds" in col_config
+        }
+
+    # 1re passe : statistiques de chaque méthode
+    with instrumentation.stage("Statistiques (1re passe)"):
+        for chunk in chunks():
+            metrics["rows"] += len(chunk)
+            metrics["columns"] = len(chunk.columns)
+            metrics["missing_after_detection"] += int(chunk.isnull().sum().sum())
+            for imputer in imputers.values():
+                imputer.partial_fit(chunk)
+
+    if metrics["missing_after_detection"] == 0 or not imputers:
+        return metrics
+
+    for method_name, imputer in imputers.items():
+        metrics["fill_values"][method_name] = imputer.fill_values
+
+    # 2e passe : remplissage et écriture de chaque bloc, pour toutes les méthodes
+    output_dir = Path(config["output_dir"])
+    output_dir.mkdir(parents=True, exist_ok=True)
+    with instrumentation.stage("Imputation (2e passe)"), ExitStack() as stack:
+        writers = {}
+        for method_name in imputers:
+            output_path = output_dir / export_file_name(
+                method_name,
+                config["export_format"],
+                prefix=f"{Path(path).stem}_imputed",
+            )
+            f = stack.enter_context(open(output_path, "wb"))
+            writers[method_name] = stack.enter_context(
+                ChunkWriter(config["export_format"], f)
+            )
+            metrics["outputs"][method_name] = str(output_path)
+
+        for chunk in chunks():
+            for method_name, imputer in imputers.items():
+                writers[method_name].write(imputer.transform(chunk))
+
+    return metrics
+
+
+def run_pipeline(config):
+    methods = build_methods(config["methods"])
+    paths = sorted(Path(config["input_dir"]).glob(config["pattern"]))
+
+    report = []
+    for path in paths:
+        try:
+            report.append(run_file(path, config, methods))
+        except Exception as e:
+            report.append({"file": str(path), "error": str(e)})
+
+    return report
+
+
+def _records(df):
+    return json.loads(df.to_json(orient="records"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Imputation des valeurs manquantes sans interface"
+    )
+    parser.add_argument("config", help="Fichier de configuration JSON")
+    parser.add_argument(
+        "--metrics",
+        help="Fichier JSON des métriques (par défaut : <output_dir>/metrics.json)",
+    )
+    args = parser.parse_args(argv)
+
+    config = load_config(args.config)
+    report = run_pipeline(config)
+
+    metrics_path = Path(args.metrics or Path(config["output_dir"]) / "metrics.json")
+    metrics_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(metrics_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False, default=str)
+
+    json.dump(report, sys.stdout, ensure_ascii=False, default=str)
+    sys.stdout.write("\n")
+
+    return 1 if any("error" in entry for entry in report) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
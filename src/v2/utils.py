@@ -1,22 +1,240 @@
+import os
+
+import numpy as np
 import pandas as pd
+import pyarrow.parquet as pq
 import streamlit as st
+from models.cache import LRUCache, hash_bytes
+from models.dataset_summary import DatasetSummary
+from pandas.api.types import union_categoricals
 from streamlit.runtime.uploaded_file_manager import UploadedFile
 
+# Taille maximale du cache des fichiers chargés (en Mo)
+DATA_CACHE_MAX_MB = int(os.environ.get("IMPUTATION_DATA_CACHE_MAX_MB", "2048"))
+# Budget mémoire des résultats d'imputation mémorisés par session (en Mo)
+RESULT_CACHE_MAX_MB = int(os.environ.get("IMPUTATION_RESULT_CACHE_MAX_MB", "1024"))
+# Nombre de tables de métriques par colonne mémorisées par session
+METRICS_CACHE_SIZE = 8
+
+# Lecture compacte : taille des blocs, taille de l'échantillon d'inférence des types
+# et ratio valeurs uniques / valeurs non nulles en dessous duquel on passe en category
+CHUNK_SIZE = 200_000
+DTYPE_SAMPLE_ROWS = 100_000
+CATEGORY_MAX_RATIO = 0.5
+
+SUPPORTED_EXTENSIONS = ["csv", "xlsx", "xls", "json", "jsonl", "parquet", "feather"]
 
-def load_data(uploaded_file: UploadedFile) -> pd.DataFrame | None:
-    """Charge les données selon le format du fichier"""
-    file_extension = uploaded_file.name.split(".")[-1].lower()
 
+def load_data(
+    uploaded_file: UploadedFile, compact: bool = False
+) -> pd.DataFrame | None:
+    """Charge les données selon le format du fichier (erreurs affichées dans
+    l'interface)"""
     try:
-        if file_extension in ["csv"]:
-            return pd.read_csv(uploaded_file)
-        elif file_extension in ["xls", "xlsx"]:
-            return pd.read_excel(uploaded_file)
-        elif file_extension in ["json"]:
-            return pd.read_json(uploaded_file)
-        else:
-            # Essayer de lire comme CSV par défaut
-            return pd.read_csv(uploaded_file)
+        return read_data(uploaded_file, compact)
     except Exception as e:
         st.error(f"Erreur lors du chargement du fichier: {str(e)}")
         return None
+
+
+def read_data(uploaded_file, compact: bool = False) -> pd.DataFrame:
+    """Lit les données selon le format du fichier ; lève l'exception d'origine
+    en cas d'échec
+
+    En mode compact, les CSV/JSON-lines sont lus par blocs et tous les formats
+    sont convertis en types compacts (float32, petits entiers nullables, category).
+    """
+    file_extension = uploaded_file.name.split(".")[-1].lower()
+
+    if compact and file_extension in ["csv", "jsonl"]:
+        return _read_chunked(uploaded_file, file_extension)
+
+    if file_extension in ["csv"]:
+        df = pd.read_csv(uploaded_file)
+    elif file_extension in ["xls", "xlsx"]:
+        df = pd.read_excel(uploaded_file)
+    elif file_extension in ["json"]:
+        df = pd.read_json(uploaded_file)
+    elif file_extension in ["jsonl"]:
+        df = pd.read_json(uploaded_file, lines=True)
+    elif file_extension in ["parquet"]:
+        df = pd.read_parquet(uploaded_file)
+    elif file_extension in ["feather"]:
+        df = pd.read_feather(uploaded_file)
+    else:
+        # Essayer de lire comme CSV par défaut
+        df = pd.read_csv(uploaded_file)
+
+    if compact:
+        df = downcast_dtypes(df, infer_compact_dtypes(df.head(DTYPE_SAMPLE_ROWS)))
+    return df
+
+
+def infer_compact_dtypes(sample: pd.DataFrame) -> dict:
+    """Déduit des types compacts à partir d'un échantillon"""
+    dtypes = {}
+
+    for col in sample.columns:
+        series = sample[col]
+
+        if pd.api.types.is_bool_dtype(series):
+            continue
+        elif pd.api.types.is_integer_dtype(series):
+            dtypes[col] = _smallest_int_dtype(series.min(), series.max())
+        elif pd.api.types.is_float_dtype(series):
+            non_null = series.dropna()
+            if len(non_null) > 0 and (non_null == non_null.round()).all():
+                # Entiers avec valeurs manquantes (lus en float64 par pandas)
+                dtypes[col] = _smallest_int_dtype(non_null.min(), non_null.max())
+            else:
+                dtypes[col] = "float32"
+        elif pd.api.types.is_object_dtype(series):
+            non_null = series.count()
+            if non_null > 0 and series.nunique() <= CATEGORY_MAX_RATIO * non_null:
+                dtypes[col] = "category"
+
+    return dtypes
+
+
+def downcast_dtypes(df: pd.DataFrame, dtypes: dict) -> pd.DataFrame:
+    """Applique les types compacts aux colonnes dont le contenu est compatible"""
+    for col, dtype in dtypes.items():
+        series = df[col]
+        all_missing = series.isnull().all()
+
+        if dtype == "category":
+            if pd.api.types.is_object_dtype(series) or all_missing:
+                df[col] = series.astype("category")
+        elif not pd.api.types.is_numeric_dtype(series) and not all_missing:
+            # Valeurs non numériques dans ce bloc (ex: "?") : on garde le type lu
+            continue
+        elif dtype == "float32" or all_missing:
+            df[col] = series.astype(dtype if all_missing else "float32")
+        else:
+            # Entiers : le bloc peut sortir de la plage vue sur l'échantillon
+            non_null = series.dropna()
+            if (non_null == non_null.round()).all():
+                int_dtype = _smallest_int_dtype(non_null.min(), non_null.max())
+                df[col] = series.astype(_widest_dtype(dtype, int_dtype))
+            else:
+                df[col] = series.astype("float32")
+
+    return df
+
+
+def _smallest_int_dtype(low, high) -> str:
+    for dtype in ["Int8", "Int16", "Int32"]:
+        info = np.iinfo(dtype.lower())
+        if info.min <= low and high <= info.max:
+            return dtype
+    return "Int64"
+
+
+def _widest_dtype(a: str, b: str) -> str:
+    order = ["Int8", "Int16", "Int32", "Int64"]
+    return max(a, b, key=order.index)
+
+
+def _read_chunked(uploaded_file, file_extension: str) -> pd.DataFrame:
+    if file_extension == "csv":
+        sample = pd.read_csv(uploaded_file, nrows=DTYPE_SAMPLE_ROWS)
+        uploaded_file.seek(0)
+        reader = pd.read_csv(uploaded_file, chunksize=CHUNK_SIZE)
+    else:
+        sample = pd.read_json(uploaded_file, lines=True, nrows=DTYPE_SAMPLE_ROWS)
+        uploaded_file.seek(0)
+        reader = pd.read_json(uploaded_file, lines=True, chunksize=CHUNK_SIZE)
+
+    dtypes = infer_compact_dtypes(sample)
+    del sample
+
+    with reader:
+        chunks = [downcast_dtypes(chunk, dtypes) for chunk in reader]
+
+    return _concat_chunks(chunks)
+
+
+def _concat_chunks(chunks: list) -> pd.DataFrame:
+    """Concatène les blocs en conservant les colonnes category (union des catégories)"""
+    if len(chunks) == 1:
+        return chunks[0]
+
+    columns = chunks[0].columns
+    category_cols = [
+        col
+        for col in columns
+        if all(isinstance(chunk[col].dtype, pd.CategoricalDtype) for chunk in chunks)
+    ]
+
+    df = pd.concat(
+        [chunk.drop(columns=category_cols) for chunk in chunks], ignore_index=True
+    )
+    for col in category_cols:
+        df[col] = union_categoricals([chunk[col] for chunk in chunks])
+
+    return df[columns]
+
+
+def read_chunks(path, chunk_size: int = CHUNK_SIZE):
+    """Lit un fichier par blocs de chunk_size lignes (CSV, JSON lines, Parquet),
+    sans jamais le charger en entier"""
+    file_extension = str(path).split(".")[-1].lower()
+
+    if file_extension == "csv":
+        with pd.read_csv(path, chunksize=chunk_size) as reader:
+            yield from reader
+    elif file_extension == "jsonl":
+        with pd.read_json(path, lines=True, chunksize=chunk_size) as reader:
+            yield from reader
+    elif file_extension == "parquet":
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        raise ValueError(
+            f"Lecture par blocs impossible pour le format .{file_extension}"
+        )
+
+
+@st.cache_resource
+def get_data_cache() -> LRUCache:
+    """Cache LRU partagé entre les reruns, borné en mémoire"""
+    return LRUCache(
+        max_size=DATA_CACHE_MAX_MB * 1024 * 1024,
+        sizeof=lambda summary: summary.nbytes,
+    )
+
+
+def load_data_cached(
+    uploaded_file: UploadedFile, compact: bool = False
+) -> DatasetSummary | None:
+    """Charge les données une seule fois par contenu de fichier"""
+    cache = get_data_cache()
+    key = (hash_bytes(uploaded_file.getbuffer()), compact)
+
+    summary = cache.get(key)
+    if summary is None:
+        df = load_data(uploaded_file, compact=compact)
+        if df is None:
+            return None
+        summary = DatasetSummary(df, key=key)
+        cache.set(key, summary)
+
+    return summary
+
+
+def get_result_cache() -> LRUCache:
+    """Résultats d'imputation mémorisés pour la session, bornés en mémoire"""
+    if "imputation_results" not in st.session_state:
+        st.session_state.imputation_results = LRUCache(
+            max_size=RESULT_CACHE_MAX_MB * 1024 * 1024,
+            sizeof=lambda entry: entry[0].nbytes + entry[1].nbytes,
+        )
+    return st.session_state.imputation_results
+
+
+def get_metrics_cache() -> LRUCache:
+    """Métriques de comparaison par colonne mémorisées pour la session : changer
+    de colonne affichée ne les recalcule pas"""
+    if "comparison_metrics" not in st.session_state:
+        st.session_state.comparison_metrics = LRUCache(METRICS_CACHE_SIZE)
+    return st.session_state.comparison_metrics